@@ -1,143 +1,461 @@
-import google.generativeai as genai
 import json
-from json_repair import repair_json
-import pandas as pd
 import asyncio
-import streamlit as st
+import os
 from utils import clean_response
+from analysis_cache import analysis_cache, make_key
+from analysis_result import AnalysisResult
+from result_store import result_store
+from stream_json import IncrementalAnalysisParser
+from long_document import (
+    EXTRACTION_SCHEMA, is_long_document, split_into_chunks, generate_extraction_prompt,
+    merge_extractions, generate_reduce_prompt, apply_extractions,
+)
+import event_loop
+from telemetry import debug_sample, log_event, record_cache, span
+from gemini_client import CALL_TIMEOUT, fallback_model, generate, generate_async, generate_with_updates, model_name_for
 
-# --- Load API Key from Secrets ---
-api_key = st.secrets["api_keys"]["GOOGLE_API_KEY"]
-genai.configure(api_key=api_key)
+# Bump whenever generate_prompt changes so cached analyses are not reused
+PROMPT_VERSION = "1"
+REWRITE_PROMPT_VERSION = "rewrite-1"
+LONG_PROMPT_VERSION = "long-1"
+# Seconds to wait for Gemini before giving up on an analysis
+ANALYSIS_TIMEOUT = float(os.environ.get("BRIEFLY_ANALYSIS_TIMEOUT", 60))
+# Chunk extraction calls in flight at once for a single long document
+LONG_DOCUMENT_CONCURRENCY = int(os.environ.get("BRIEFLY_LONG_DOCUMENT_CONCURRENCY", 4))
 
-def generate_prompt(text):
-    return f"""
-    ## Marketing Brief Analysis Request
-
-    Please analyze the following marketing brief and provide a structured response suitable for Python processing, with scores as numbers out of 100. 
-    Extract specific details and insights where possible.
-
-    **Marketing Brief Text:**
-
-    ```
-    {text}
-    ```
-
-    **Response Format:**
+# Output schema shared by the single-call and long-document analysis prompts
+RESPONSE_FORMAT = """    **Response Format:**
 
     ```json
-    {{
-      "overall_score": {{score}},
-      "breakdown": {{
-        "clarity_of_objectives": {{
-          "score": {{score}},
-          "feedback": "{{feedback}}",
+    {
+      "overall_score": {score},
+      "breakdown": {
+        "clarity_of_objectives": {
+          "score": {score},
+          "feedback": "{feedback}",
           "extracted_objectives": ["list of extracted objectives from the text"], 
           "keywords": ["list of relevant keywords"]
-        }},
-        "strategic_alignment": {{
-          "score": {{score}},
-          "feedback": "{{feedback}}",
+        },
+        "strategic_alignment": {
+          "score": {score},
+          "feedback": "{feedback}",
           "alignment_issues": ["list of potential misalignments with business goals (if any)"]
-        }},
-        "target_audience_definition": {{
-          "score": {{score}},
-          "feedback": "{{feedback}}",
+        },
+        "target_audience_definition": {
+          "score": {score},
+          "feedback": "{feedback}",
           "extracted_demographics": ["age", "location", "interests", "other relevant demographics"],
           "target_audience_examples": ["specific examples of the target audience mentioned in the text"]
-        }},
-        "competitive_analysis": {{
-          "score": {{score}},
-          "feedback": "{{feedback}}",
+        },
+        "competitive_analysis": {
+          "score": {score},
+          "feedback": "{feedback}",
           "competitors_mentioned": ["list of competitor brands mentioned"],
           "competitive_advantages": ["list of mentioned or implied competitive advantages"]
-        }},
-        "channel_strategy": {{
-          "score": {{score}},
-          "feedback": "{{feedback}}",
+        },
+        "channel_strategy": {
+          "score": {score},
+          "feedback": "{feedback}",
           "recommended_channels": ["list of potentially effective channels based on the brief"],
           "channel_justifications": ["reasons for recommending each channel"]
-        }},
-        "key_performance_indicators": {{
-          "score": {{score}},
-          "feedback": "{{feedback}}",
+        },
+        "key_performance_indicators": {
+          "score": {score},
+          "feedback": "{feedback}",
           "extracted_kpis": ["list of KPIs mentioned in the brief"],
           "kpi_suggestions": ["suggestions for additional relevant KPIs"]
-        }}
-      }},
+        }
+      },
       "gap_analysis": [
             "List of missing elements (if any)",
             "Another missing element"
         ]
-    }}
+    }
     """
 
-async def analyze_text_async(text):
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(None, analyze_text, text)
-    return result
+# List fields of each breakdown category, mirroring RESPONSE_FORMAT
+CATEGORY_FIELDS = {
+    "clarity_of_objectives": ["extracted_objectives", "keywords"],
+    "strategic_alignment": ["alignment_issues"],
+    "target_audience_definition": ["extracted_demographics", "target_audience_examples"],
+    "competitive_analysis": ["competitors_mentioned", "competitive_advantages"],
+    "channel_strategy": ["recommended_channels", "channel_justifications"],
+    "key_performance_indicators": ["extracted_kpis", "kpi_suggestions"],
+}
 
-def analyze_text(text):
-    model = genai.GenerativeModel(model_name="gemini-1.5-flash")
-    prompt = generate_prompt(text)
+def _string_list():
+    return {"type": "array", "items": {"type": "string"}}
 
-    try:
-        response = model.generate_content(prompt)
-        response_text = response.text
+def analysis_schema(categories=tuple(CATEGORY_FIELDS), include_totals=True):
+    """Gemini response_schema for an analysis, limited to ``categories`` when re-asking for a few.
+
+    ``include_totals`` adds overall_score and gap_analysis alongside the breakdown.
+    """
+    breakdown = {
+        category: {
+            "type": "object",
+            "properties": {
+                "score": {"type": "integer"},
+                "feedback": {"type": "string"},
+                **{field: _string_list() for field in CATEGORY_FIELDS[category]},
+            },
+            "required": ["score", "feedback", *CATEGORY_FIELDS[category]],
+        }
+        for category in categories
+    }
+    # Gemini rejects object schemas without properties, so a totals-only re-ask omits the breakdown
+    properties = {"breakdown": {"type": "object", "properties": breakdown, "required": list(categories)}} if categories else {}
+    if include_totals:
+        properties = {"overall_score": {"type": "integer"}, **properties, "gap_analysis": _string_list()}
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+def json_config(schema):
+    """generation_config asking Gemini for JSON that conforms to ``schema``."""
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+ANALYSIS_CONFIG = json_config(analysis_schema())
+# Gemini fills schema properties in alphabetical order (the schema's properties are a
+# protobuf map), which would stream overall_score last and the categories out of order.
+# The streamed call therefore asks for JSON only and relies on RESPONSE_FORMAT's order,
+# so the score preview still arrives first; the final parse re-asks for anything missing.
+STREAM_ANALYSIS_CONFIG = {"response_mime_type": "application/json"}
+
+@span("prompt_build", kind="analysis")
+def generate_prompt(text):
+    return f"""
+    ## Marketing Brief Analysis Request
+
+    Please analyze the following marketing brief and provide a structured response suitable for Python processing, with scores as numbers out of 100. 
+    Extract specific details and insights where possible.
+
+    **Marketing Brief Text:**
+
+    ```
+    {text}
+    ```
+
+{RESPONSE_FORMAT}"""
+
+def analysis_key(text):
+    """Cache key of a document's analysis; long documents are keyed by both models map-reduce uses."""
+    if is_long_document(text):
+        return make_key(text, f"{model_name_for('analysis')}+{model_name_for('extraction')}", LONG_PROMPT_VERSION)
+    return make_key(text, model_name_for('analysis'), PROMPT_VERSION)
+
+def answered_key(cache_key, served_by=None):
+    """The key a result is cached under: ``cache_key``, suffixed with the model when the fallback answered.
+
+    Keys name the primary model, so fallback answers get their own key and
+    lookups by the primary key (other sessions, other replicas) never see them.
+    """
+    return f"{cache_key}@{served_by}" if served_by else cache_key
+
+def candidate_keys(cache_key, stored_key=None):
+    """Keys to look a result up under: a caller's ``stored_key`` for the same request first, then ``cache_key``.
+
+    ``stored_key`` is the key an earlier call reported (e.g. a fallback
+    answer's answered_key); it is ignored unless it belongs to ``cache_key``.
+    """
+    if stored_key and stored_key != cache_key and stored_key.startswith(f"{cache_key}@"):
+        return [stored_key, cache_key]
+    return [cache_key]
+
+def lookup_stored_analysis(cache_key, stored_key=None):
+    """lookup_analysis over candidate_keys; returns ``(analysis, key)`` or ``(None, None)``."""
+    for key in candidate_keys(cache_key, stored_key):
+        analysis = lookup_analysis(key)
+        if analysis is not None:
+            return analysis, key
+    return None, None
+
+def lookup_analysis(cache_key):
+    """Returns a cached AnalysisResult from memory or the shared store, if any.
+
+    Reads SQLite, so coroutines call it through asyncio.to_thread to keep the shared loop free.
+    """
+    analysis = analysis_cache.get(cache_key)
+    if analysis is None:
+        response_data = result_store.get(cache_key)
+        record_cache("result_store", response_data is not None)
+        if response_data is not None:
+            analysis = AnalysisResult.from_response(response_data)
+            analysis_cache.put(cache_key, analysis)
+    return analysis
+
+def parse_response(response_text):
+    """Parses a raw Gemini JSON response, cleaning and repairing it only when it is not valid as-is.
+
+    Repair is CPU-bound, so coroutines call this through asyncio.to_thread.
+    """
+    with span("json_parse", path="fast") as labels:
+        # --- Schema-constrained responses are normally valid JSON already ---
+        try:
+            return json.loads(response_text)
+        except json.JSONDecodeError:
+            labels["path"] = "repair"
 
         # --- Clean up the response ---
         response_text = clean_response(response_text)
 
         # --- Repair potentially malformed JSON ---
+        from json_repair import repair_json
         try:
             response_text = repair_json(response_text)
         except Exception as e:
-            print(f"Warning: json_repair could not fix the JSON: {e}")
+            log_event("json_repair_failed", error=str(e))
 
         # Directly try to parse as JSON
-        response_data = json.loads(response_text)
-
-        # Extract data for DataFrame (corrected structure)
-        data = {}
-
-        for category, details in response_data['breakdown'].items():
-            category_title = category.replace('_', ' ').title()
-            
-            # Store all details for the category in a dictionary
-            data[category_title] = {
-                'Score': int(details['score']),
-                'Feedback': details['feedback'],
-                'Extracted Objectives': details.get('extracted_objectives', []),
-                'Keywords': details.get('keywords', []),
-                'Alignment Issues': details.get('alignment_issues', []),
-                'Extracted Demographics': details.get('extracted_demographics', []),
-                'Target Audience Examples': details.get('target_audience_examples', []),
-                'Competitors Mentioned': details.get('competitors_mentioned', []),
-                'Competitive Advantages': details.get('competitive_advantages', []),
-                'Recommended Channels': details.get('recommended_channels', []),
-                'Channel Justifications': details.get('channel_justifications', []),
-                'Extracted KPIs': details.get('extracted_kpis', []),
-                'KPI Suggestions': details.get('kpi_suggestions', []),
-                'Target Locations': details.get('target_locations', [])  # Add target locations extraction
-            } 
-
-        df_results = pd.DataFrame.from_dict(data, orient='index')
-        overall_score = int(response_data['overall_score'])
-
-        # Extract gap analysis results
-        gap_analysis_results = response_data.get('gap_analysis', [])
-
-        # Extract competitors mentioned
-        competitors_mentioned = data['Competitive Analysis']['Competitors Mentioned']
-
-        return df_results, overall_score, gap_analysis_results, competitors_mentioned 
+        return json.loads(response_text)
+
+def finish_analysis(cache_key, response_data, served_by=None):
+    """Builds the AnalysisResult for a parsed response, caches it and returns ``(analysis, key)``.
+
+    ``served_by`` is the fallback model if it answered any of the calls, which
+    keeps the result under its own key (see answered_key). Writes SQLite, so
+    coroutines call it through asyncio.to_thread.
+    """
+    key = answered_key(cache_key, served_by)
+    analysis = AnalysisResult.from_response(response_data)
+    analysis_cache.put(key, analysis)
+    result_store.put(key, analysis.to_response())
+    return analysis, key
+
+def _valid_score(value):
+    if isinstance(value, bool):
+        return False
+    try:
+        int(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+def _valid_category(details):
+    return isinstance(details, dict) and _valid_score(details.get('score')) and isinstance(details.get('feedback'), str)
+
+def find_invalid_parts(response_data):
+    """Returns the expected categories that are missing or malformed, and whether overall_score is."""
+    breakdown = response_data.get('breakdown')
+    if not isinstance(breakdown, dict):
+        breakdown = {}
+    categories = [category for category in CATEGORY_FIELDS if not _valid_category(breakdown.get(category))]
+    return categories, not _valid_score(response_data.get('overall_score'))
+
+def generate_reask_prompt(prompt, categories, include_totals):
+    fields = [f"breakdown.{category}" for category in categories]
+    if include_totals:
+        fields += ["overall_score", "gap_analysis"]
+    return prompt + f"""
+    **Follow-up:**
+
+    A previous answer to this request was missing or had invalid values for: {', '.join(fields)}.
+    Respond with only these entries, in the response format above.
+    """
+
+async def reask_parts(prompt, response_data, categories, include_totals, timeout, user_id):
+    """Asks Gemini again for only the given parts and merges valid answers into ``response_data``.
+
+    Returns the fallback model's name if it answered the re-ask, else None.
+    """
+    log_event("reask", categories=len(categories), overall_score=include_totals)
+    response = await generate_async(
+        "analysis", generate_reask_prompt(prompt, categories, include_totals), timeout,
+        user_id=user_id, generation_config=json_config(analysis_schema(categories, include_totals)),
+    )
+    served_by = fallback_model("analysis", response)
+    try:
+        reask_data = await asyncio.to_thread(parse_response, response.text)
     except json.JSONDecodeError as e:
-        print(f"Error decoding JSON: {e}")
-        print(f"Raw response: {response.text}")
-        return None, None, None, []
+        log_event("json_decode_failed", stage="reask", error=str(e))
+        debug_sample("undecodable response", stage="reask", response=response.text)
+        return served_by
+    if not isinstance(reask_data, dict):
+        return served_by
 
-def rewrite_brief(original_text, df_results):
-    """Generates an improved marketing brief using Google Gemini."""
+    breakdown = response_data.setdefault('breakdown', {})
+    for category, details in (reask_data.get('breakdown') or {}).items():
+        if category in categories:
+            breakdown[category] = details
+    if include_totals:
+        response_data['overall_score'] = reask_data.get('overall_score')
+        response_data['gap_analysis'] = reask_data.get('gap_analysis', [])
+    return served_by
+
+async def complete_analysis(prompt, response_text, timeout=ANALYSIS_TIMEOUT, user_id="default"):
+    """Parses an analysis response, re-asking Gemini once for just the parts that are missing or invalid.
+
+    Returns ``(response_data, served_by)``: the parsed response (None if it is
+    still incomplete after the re-ask) and the fallback model if it answered
+    the re-ask, else None.
+    """
+    try:
+        response_data = await asyncio.to_thread(parse_response, response_text)
+    except json.JSONDecodeError as e:
+        log_event("json_decode_failed", stage="analysis", error=str(e))
+        debug_sample("undecodable response", stage="analysis", response=response_text)
+        response_data = {}
+    if not isinstance(response_data, dict):
+        response_data = {}
+    if not isinstance(response_data.get('breakdown'), dict):
+        response_data['breakdown'] = {}
+
+    served_by = None
+    categories, include_totals = find_invalid_parts(response_data)
+    if categories or include_totals:
+        served_by = await reask_parts(prompt, response_data, categories, include_totals, timeout, user_id)
+        if any(find_invalid_parts(response_data)):
+            return None, served_by
+
+    # Drop any extra categories the model invented that would not build
+    response_data['breakdown'] = {
+        category: details for category, details in response_data['breakdown'].items() if _valid_category(details)
+    }
+    return response_data, served_by
+
+async def parse_analysis(cache_key, prompt, response_text, timeout=ANALYSIS_TIMEOUT, user_id="default", served_by=None):
+    """Completes, parses and caches a raw Gemini response answered by ``served_by`` (if the fallback).
+
+    Returns ``(analysis, key)``: the AnalysisResult and the key it is cached
+    under, or ``(None, None)`` on failure.
+    """
+    response_data, reask_served_by = await complete_analysis(prompt, response_text, timeout, user_id)
+    if response_data is None:
+        return None, None
+    return await asyncio.to_thread(finish_analysis, cache_key, response_data, served_by or reask_served_by)
+
+def analyze_text(text, user_id="default"):
+    """Blocking analyze_text_async, run on the shared event loop."""
+    return event_loop.run(analyze_text_async(text, user_id=user_id))
+
+async def analyze_text_async(text, timeout=ANALYSIS_TIMEOUT, user_id="default"):
+    """Async analyze_text using Gemini's native async API.
+
+    Run it on the shared loop from event_loop rather than with asyncio.run,
+    so the async client is reused across reruns. Raises TimeoutError if
+    Gemini has not answered within ``timeout`` seconds of being admitted by
+    the rate limiter, where calls are queued fairly per ``user_id``.
+    """
+    if is_long_document(text):
+        return await analyze_long_text_async(text, timeout, user_id)
+
+    cache_key = analysis_key(text)
+    analysis = await asyncio.to_thread(lookup_analysis, cache_key)
+    if analysis is not None:
+        return analysis
+
+    prompt = generate_prompt(text)
+
+    response = await generate_async("analysis", prompt, timeout, user_id=user_id, generation_config=ANALYSIS_CONFIG)
+    analysis, _ = await parse_analysis(
+        cache_key, prompt, response.text, timeout, user_id, fallback_model("analysis", response)
+    )
+    return analysis
+
+async def analyze_text_stream(text, timeout=ANALYSIS_TIMEOUT, user_id="default", stored_key=None):
+    """Streams an analysis, yielding partial results as soon as they are complete.
+
+    Yields ``('queued', position)`` while the call waits behind other users'
+    calls in the rate limiter, ``('overall_score', score)`` and
+    ``('category', name, details)`` events while Gemini is still generating,
+    then a final ``('result', analysis, key)`` with the AnalysisResult
+    analyze_text returns and the key it is cached under (see answered_key). The
+    final result always comes from parsing the whole response, so a stream
+    that ends malformed is still repaired, and missing categories re-asked.
+    Long documents use the map-reduce path and only yield the final result.
+    Pass a key from an earlier result as ``stored_key`` so reruns are served
+    the answer the caller already has, even when a fallback model gave it.
+    """
+    if is_long_document(text):
+        yield ('result', *await _analyze_long_text(text, timeout, user_id, stored_key))
+        return
+
+    cache_key = analysis_key(text)
+    analysis, key = await asyncio.to_thread(lookup_stored_analysis, cache_key, stored_key)
+    if analysis is not None:
+        yield 'result', analysis, key
+        return
+
+    prompt = generate_prompt(text)
+
+    async for kind, value in generate_with_updates(
+        "analysis", prompt, timeout, user_id, stream=True, generation_config=STREAM_ANALYSIS_CONFIG
+    ):
+        if kind == 'queued':
+            yield 'queued', value
+        else:
+            response = value
+
+    # Reading the stream gets its own deadline, started once the call was admitted and opened
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    parser = IncrementalAnalysisParser()
+    chunks = []
+    response_chunks = aiter(response)
+    while True:
+        try:
+            chunk = await asyncio.wait_for(anext(response_chunks), deadline - loop.time())
+        except StopAsyncIteration:
+            break
+        chunks.append(chunk.text)
+        for event in parser.feed(chunk.text):
+            yield event
+
+    analysis, key = await parse_analysis(
+        cache_key, prompt, ''.join(chunks), timeout, user_id, fallback_model("analysis", response)
+    )
+    yield 'result', analysis, key
+
+async def analyze_long_text_async(text, timeout=ANALYSIS_TIMEOUT, user_id="default"):
+    """Map-reduce analysis for briefs too long to send in a single prompt.
+
+    The text is split into section-aware chunks whose details are extracted
+    concurrently, then one reduce call scores the whole brief from the
+    merged summaries and deduplicated lists. ``timeout`` applies per call.
+    """
+    analysis, _ = await _analyze_long_text(text, timeout, user_id)
+    return analysis
+
+async def _analyze_long_text(text, timeout, user_id, stored_key=None):
+    """analyze_long_text_async, returning ``(analysis, key)`` like parse_analysis."""
+    cache_key = analysis_key(text)
+    analysis, key = await asyncio.to_thread(lookup_stored_analysis, cache_key, stored_key)
+    if analysis is not None:
+        return analysis, key
+    served_by = []  # Fallback models that answered any of the calls
+
+    chunks = split_into_chunks(text)
+    semaphore = asyncio.Semaphore(LONG_DOCUMENT_CONCURRENCY)
+
+    async def extract(index, chunk):
+        prompt = generate_extraction_prompt(chunk, index, len(chunks))
+        async with semaphore:
+            response = await generate_async(
+                "extraction", prompt, timeout, user_id=user_id, generation_config=json_config(EXTRACTION_SCHEMA)
+            )
+        served_by.append(fallback_model("extraction", response))
+        try:
+            extraction = await asyncio.to_thread(parse_response, response.text)
+        except json.JSONDecodeError as e:
+            log_event("json_decode_failed", stage="extraction", chunk=index + 1, error=str(e))
+            return {}
+        return extraction if isinstance(extraction, dict) else {}
+
+    extractions = await asyncio.gather(*(extract(i, chunk) for i, chunk in enumerate(chunks)))
+    merged = merge_extractions(extractions)
+
+    prompt = generate_reduce_prompt(merged, RESPONSE_FORMAT)
+    response = await generate_async("analysis", prompt, timeout, user_id=user_id, generation_config=ANALYSIS_CONFIG)
+    response_data, reask_served_by = await complete_analysis(prompt, response.text, timeout, user_id)
+    if response_data is None:
+        return None, None
+    served_by += [fallback_model("analysis", response), reask_served_by]
+    return await asyncio.to_thread(
+        finish_analysis, cache_key, apply_extractions(response_data, merged), next(filter(None, served_by), None)
+    )
+
+@span("prompt_build", kind="rewrite")
+def build_rewrite_prompt(original_text, analysis):
+    """Builds the rewrite prompt along with the suggestions and from/to quotes shown to the user."""
 
     # Construct a prompt incorporating feedback from the analysis
     prompt = f"""
@@ -153,11 +471,11 @@ def rewrite_brief(original_text, df_results):
     suggestions = {}
     from_to_quotes = {}
 
-    for category, details in df_results.iterrows():
-        prompt += f"**{category.title()}:** {details['Feedback']}\n"
+    for category, details in analysis.categories.items():
+        prompt += f"**{category.title()}:** {details.feedback}\n"
         
         # Generate suggestions based on missing elements
-        if category == 'Competitive Landscape' and not details['Competitors Mentioned']:
+        if category == 'Competitive Landscape' and not details.competitors_mentioned:
             competitors = ["Competitor A", "Competitor B", "Competitor C"]
             suggestions[category] = f"Consider adding relevant competitors such as {', '.join(competitors)} to better understand the competitive landscape."
             from_to_quotes[category] = {
@@ -165,7 +483,7 @@ def rewrite_brief(original_text, df_results):
                 "to": f"Added relevant competitors such as {', '.join(competitors)}."
             }
             prompt += f"Add relevant competitors such as {', '.join(competitors)}.\n"
-        elif category == 'Target Audience' and not details['Extracted Demographics']:
+        elif category == 'Target Audience' and not details.extracted_demographics:
             demographics = ["age 25-34", "gender: female", "location: New York", "interests: fitness, wellness"]
             suggestions[category] = f"Specify target demographics such as {', '.join(demographics)} to tailor your strategy effectively."
             from_to_quotes[category] = {
@@ -173,7 +491,7 @@ def rewrite_brief(original_text, df_results):
                 "to": f"Included target demographics such as {', '.join(demographics)}."
             }
             prompt += f"Include target demographics such as {', '.join(demographics)}.\n"
-        elif category == 'Channel Strategy' and not details['Recommended Channels']:
+        elif category == 'Channel Strategy' and not details.recommended_channels:
             channels = ["social media", "email marketing", "paid advertising"]
             suggestions[category] = f"Include recommended channels such as {', '.join(channels)} to reach your audience more effectively."
             from_to_quotes[category] = {
@@ -181,7 +499,7 @@ def rewrite_brief(original_text, df_results):
                 "to": f"Recommended channels such as {', '.join(channels)}."
             }
             prompt += f"Recommend channels such as {', '.join(channels)}.\n"
-        elif category == 'Measurement Kpis' and not details['Extracted KPIs']:
+        elif category == 'Measurement Kpis' and not details.extracted_kpis:
             kpis = ["conversion rate", "click-through rate", "customer acquisition cost"]
             suggestions[category] = f"Define specific KPIs such as {', '.join(kpis)} to measure the success of your campaign."
             from_to_quotes[category] = {
@@ -192,7 +510,7 @@ def rewrite_brief(original_text, df_results):
         else:
             # For other categories or if already specified, include general improvements
             from_to_quotes[category] = {
-                "from": details['Feedback'],
+                "from": details.feedback,
                 "to": f"Enhanced {category.lower()} based on feedback."
             }
 
@@ -201,12 +519,92 @@ def rewrite_brief(original_text, df_results):
     Maintain the original core message and objectives. Use crisp and clear language, and ensure the brief is detailed, actionable, and relevant.
     """
 
-    model = genai.GenerativeModel(model_name="gemini-1.5-flash")  # Or your preferred Gemini model
-    response = model.generate_content(prompt)
-    
-    # Debugging output
-    print("Generated Prompt:", prompt)
-    print("Suggestions:", suggestions)
-    print("From-To Quotes:", from_to_quotes)
+    return prompt, suggestions, from_to_quotes
+
+def rewrite_brief(original_text, analysis, user_id="default"):
+    """Generates an improved marketing brief using Google Gemini."""
+    prompt, suggestions, from_to_quotes = build_rewrite_prompt(original_text, analysis)
+
+    # --- Serve repeat rewrites from the shared store ---
+    cache_key = make_key(prompt, model_name_for('rewrite'), REWRITE_PROMPT_VERSION)
+    cached = result_store.get(cache_key)
+    record_cache("result_store", cached is not None)
+    if cached is not None:
+        return cached['text'], suggestions, from_to_quotes
+
+    response = generate("rewrite", prompt, user_id=user_id)
+    debug_sample("rewrite prompt", prompt=prompt, suggestions=suggestions, from_to_quotes=from_to_quotes)
+
+    result_store.put(answered_key(cache_key, fallback_model("rewrite", response)), {'text': response.text})
+    return response.text, suggestions, from_to_quotes
+
+async def stream_rewrite(prompt, user_id="default", timeout=CALL_TIMEOUT):
+    """Yields ('queued', position) while waiting for a rate-limiter slot, then the rewrite's text chunks.
+
+    A ('fallback', model) event precedes the text when the fallback model answered.
+    Raises TimeoutError if the whole stream takes longer than ``timeout`` to read.
+    """
+    async for kind, value in generate_with_updates("rewrite", prompt, timeout, user_id, stream=True):
+        if kind == 'queued':
+            yield kind, value
+        else:
+            response = value
+    served_by = fallback_model("rewrite", response)
+    if served_by:
+        yield 'fallback', served_by
+
+    # Reading the stream gets its own deadline, as in analyze_text_stream
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    response_chunks = aiter(response)
+    while True:
+        try:
+            chunk = await asyncio.wait_for(anext(response_chunks), deadline - loop.time())
+        except StopAsyncIteration:
+            break
+        yield chunk.text
+
+def rewrite_brief_stream(original_text, analysis, user_id="default", on_queue=None, on_stored=None, stored_key=None):
+    """Streaming variant of rewrite_brief.
+
+    Returns a generator of text chunks as Gemini produces them, plus the
+    suggestions and from/to quotes. The full text is stored once the stream
+    completes, so repeat rewrites are served from the store in one chunk.
+    While the call is queued behind other users, ``on_queue`` is called with
+    the queue position from the thread consuming the generator.
+    ``on_stored`` is called with the key a new rewrite was stored under,
+    which names the fallback model if it answered (see answered_key); pass
+    it back as ``stored_key`` so later reruns serve that same rewrite.
+    """
+    prompt, suggestions, from_to_quotes = build_rewrite_prompt(original_text, analysis)
+    cache_key = make_key(prompt, model_name_for('rewrite'), REWRITE_PROMPT_VERSION)
+
+    def stream_chunks():
+        cached = None
+        for key in candidate_keys(cache_key, stored_key):
+            cached = result_store.get(key)
+            if cached is not None:
+                break
+        record_cache("result_store", cached is not None)
+        if cached is not None:
+            yield cached['text']
+            return
+
+        chunks = []
+        key = cache_key
+        for text in event_loop.iterate(stream_rewrite(prompt, user_id)):
+            if isinstance(text, tuple):
+                kind, value = text
+                if kind == 'queued' and on_queue is not None:
+                    on_queue(value)
+                elif kind == 'fallback':
+                    key = answered_key(cache_key, value)
+                continue
+            chunks.append(text)
+            yield text
+
+        result_store.put(key, {'text': ''.join(chunks)})
+        if on_stored is not None:
+            on_stored(key)
 
-    return response.text, suggestions, from_to_quotes
\ No newline at end of file
+    return stream_chunks(), suggestions, from_to_quotes
@@ -0,0 +1,59 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from telemetry import watch_cache
+
+# Upper bound on cached analyses held in memory per process
+DEFAULT_MAX_ENTRIES = 256
+
+def make_key(text, model_name, prompt_version):
+    """Builds a content-addressed cache key for a document."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model_name}:{prompt_version}:{digest}"
+
+class LRUCache:
+    """Thread-safe LRU cache with a fixed number of entries."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+# Shared across Streamlit reruns and sessions, since modules are imported once per process
+analysis_cache = LRUCache()
+watch_cache("analysis", analysis_cache)
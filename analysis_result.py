@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+
+# Display label of each extracted list, in the column order of the results table
+LIST_FIELD_LABELS = {
+    "extracted_objectives": "Extracted Objectives",
+    "keywords": "Keywords",
+    "alignment_issues": "Alignment Issues",
+    "extracted_demographics": "Extracted Demographics",
+    "target_audience_examples": "Target Audience Examples",
+    "competitors_mentioned": "Competitors Mentioned",
+    "competitive_advantages": "Competitive Advantages",
+    "recommended_channels": "Recommended Channels",
+    "channel_justifications": "Channel Justifications",
+    "extracted_kpis": "Extracted KPIs",
+    "kpi_suggestions": "KPI Suggestions",
+    "target_locations": "Target Locations",
+}
+
+def _strings(values):
+    if not isinstance(values, (list, tuple)):
+        return ()
+    return tuple(str(value) for value in values)
+
+@dataclass(frozen=True, slots=True)
+class CategoryResult:
+    """Score, feedback and extracted lists for one breakdown category.
+
+    Lists are stored as tuples, so categories that extract nothing share the
+    empty tuple instead of each holding a dozen empty lists.
+    """
+    key: str
+    score: int
+    feedback: str
+    extracted_objectives: tuple[str, ...] = ()
+    keywords: tuple[str, ...] = ()
+    alignment_issues: tuple[str, ...] = ()
+    extracted_demographics: tuple[str, ...] = ()
+    target_audience_examples: tuple[str, ...] = ()
+    competitors_mentioned: tuple[str, ...] = ()
+    competitive_advantages: tuple[str, ...] = ()
+    recommended_channels: tuple[str, ...] = ()
+    channel_justifications: tuple[str, ...] = ()
+    extracted_kpis: tuple[str, ...] = ()
+    kpi_suggestions: tuple[str, ...] = ()
+    target_locations: tuple[str, ...] = ()
+
+    @classmethod
+    def from_response(cls, key, details):
+        return cls(
+            key=key,
+            score=int(details['score']),
+            feedback=details['feedback'],
+            **{name: _strings(details.get(name)) for name in LIST_FIELD_LABELS},
+        )
+
+    @property
+    def title(self):
+        """Display name, e.g. "Clarity Of Objectives" for clarity_of_objectives."""
+        return self.key.replace('_', ' ').title()
+
+    def extracted(self):
+        """(label, values) for each non-empty extracted list."""
+        return [(label, getattr(self, name)) for name, label in LIST_FIELD_LABELS.items() if getattr(self, name)]
+
+    def to_response(self):
+        details = {'score': self.score, 'feedback': self.feedback}
+        details.update((name, list(getattr(self, name))) for name in LIST_FIELD_LABELS)
+        return details
+
+    def to_row(self):
+        """The category as a results-table row keyed by display labels."""
+        row = {'Score': self.score, 'Feedback': self.feedback}
+        row.update((label, list(getattr(self, name))) for name, label in LIST_FIELD_LABELS.items())
+        return row
+
+@dataclass(frozen=True, slots=True)
+class AnalysisResult:
+    """A parsed brief analysis: the form kept in memory, in caches and in session state.
+
+    Build a pandas table with to_dataframe only where one is displayed.
+    """
+    overall_score: int
+    categories: dict  # Display title -> CategoryResult, in response order
+    gap_analysis: tuple[str, ...] = ()
+
+    @classmethod
+    def from_response(cls, response_data):
+        """Builds the result from a parsed Gemini response (or a stored to_response dict)."""
+        categories = {}
+        for key, details in response_data['breakdown'].items():
+            category = CategoryResult.from_response(key, details)
+            categories[category.title] = category
+        return cls(
+            overall_score=int(response_data['overall_score']),
+            categories=categories,
+            gap_analysis=_strings(response_data.get('gap_analysis')),
+        )
+
+    def to_response(self):
+        """The result in Gemini's response format, for JSON storage and output."""
+        return {
+            'overall_score': self.overall_score,
+            'breakdown': {category.key: category.to_response() for category in self.categories.values()},
+            'gap_analysis': list(self.gap_analysis),
+        }
+
+    @property
+    def competitors_mentioned(self):
+        category = self.categories.get('Competitive Analysis')
+        return category.competitors_mentioned if category else ()
+
+    def to_dataframe(self, columns=None):
+        """One row per category, indexed by title; optionally limited to ``columns`` labels."""
+        import pandas as pd
+        df = pd.DataFrame.from_dict(
+            {title: category.to_row() for title, category in self.categories.items()}, orient='index'
+        )
+        return df[columns] if columns else df
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from text_extraction import extract_document
+from ai_analysis import analyze_text_async
+from telemetry import log_event
+
+# Maximum number of extractions / Gemini calls in flight for one batch
+MAX_CONCURRENCY = int(os.environ.get("BRIEFLY_BATCH_CONCURRENCY", 4))
+
+def extract_text(file_name, source):
+    """Extracts a DOCX or PDF by file extension, reusing memoized text for repeat files.
+
+    ``source`` may be bytes, a path or a binary file object such as a
+    Streamlit upload, which is read in place rather than copied.
+    """
+    text, _ = extract_document(file_name, source)
+    return text
+
+def extract_texts(files, max_workers=MAX_CONCURRENCY):
+    """Extracts text from a list of (file_name, source) pairs in parallel.
+
+    Returns a list of (file_name, text) pairs in the input order; text is
+    None when extraction failed.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        texts = pool.map(lambda file: extract_text(*file), files)
+        return [(file_name, text) for (file_name, _), text in zip(files, texts)]
+
+async def analyze_batch(documents, concurrency=MAX_CONCURRENCY, user_id="default"):
+    """Analyzes (file_name, text) pairs concurrently, yielding each result as it finishes."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(file_name, text):
+        async with semaphore:
+            try:
+                return file_name, await analyze_text_async(text, user_id=user_id)
+            except Exception as e:
+                log_event("batch_analysis_failed", logging.ERROR, file=file_name, error=str(e))
+                return file_name, None
+
+    tasks = [asyncio.create_task(run(file_name, text)) for file_name, text in documents]
+    for next_done in asyncio.as_completed(tasks):
+        yield await next_done
+
+def summarize_batch(batch_results):
+    """Builds a table comparing overall and per-category scores across a batch."""
+    import pandas as pd
+
+    rows = []
+    for file_name, analysis in batch_results:
+        if analysis is None:
+            continue
+        row = {'Brief': file_name, 'Overall Score': analysis.overall_score}
+        row.update((title, category.score) for title, category in analysis.categories.items())
+        row['Gaps'] = len(analysis.gap_analysis)
+        rows.append(row)
+
+    if not rows:
+        return pd.DataFrame(columns=['Brief', 'Overall Score'])
+    return pd.DataFrame(rows).sort_values('Overall Score', ascending=False)
@@ -0,0 +1,225 @@
+"""Deterministic synthetic briefs for the benchmarks.
+
+Every document is generated from a fixed seed, so the same size and layout
+always produce the same text and the same timings measure the same work.
+DOCX files are written with python-docx; PDFs with a small built-in writer
+(standard Helvetica, no extra dependency) that mimics exported briefs:
+a repeated header and "Page n of N" footer on every page, and optionally a
+ruled table of figures in each section.
+"""
+import io
+import json
+import os
+import random
+import tempfile
+
+# Bump whenever generation changes so cached corpus files are rebuilt
+CORPUS_VERSION = "1"
+CORPUS_DIR = os.environ.get("BRIEFLY_BENCH_CORPUS", os.path.join(tempfile.gettempdir(), "briefly_bench_corpus"))
+DEFAULT_SIZES = (1, 10, 50, 300)
+SEED = 1234
+
+LINES_PER_PAGE = 44
+CHARS_PER_LINE = 95
+HEADER = "Northwind Outfitters - Marketing Brief - Confidential"
+
+SECTIONS = [
+    "Objectives", "Target Audience", "Key Performance Indicators", "Competitive Landscape",
+    "Channel Strategy", "Budget and Timeline", "Creative Direction", "Measurement Plan",
+]
+_SUBJECTS = [
+    "The campaign", "Our spring launch", "The loyalty programme", "This initiative", "The brand team",
+    "Paid social", "The retail partnership", "Email nurture", "The new trail range",
+]
+_VERBS = [
+    "aims to grow", "will increase", "should lift", "targets", "is expected to improve",
+    "must protect", "will test", "reallocates budget toward",
+]
+_OBJECTS = [
+    "online sales among adults aged 25-34", "repeat purchases in Boston and Denver", "brand awareness versus Patagonia",
+    "click-through rate on Instagram and TikTok", "average order value by 12%", "newsletter sign-ups by 20,000",
+    "store visits in the Pacific Northwest", "share of voice against The North Face",
+]
+_QUALIFIERS = [
+    "by the end of Q3", "within a budget of $250,000", "without raising acquisition cost",
+    "while keeping return rates flat", "measured weekly in the dashboard", "compared with last year's results",
+    "across all priority markets", "as agreed with the regional leads",
+]
+TABLE_HEADER = ["Metric", "Baseline", "Target", "Owner"]
+_TABLE_ROWS = 5
+
+def _sentence(rng):
+    return f"{rng.choice(_SUBJECTS)} {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} {rng.choice(_QUALIFIERS)}."
+
+def _paragraph(rng, sentences):
+    return " ".join(_sentence(rng) for _ in range(sentences))
+
+def _table(rng):
+    rows = [TABLE_HEADER]
+    for _ in range(_TABLE_ROWS):
+        baseline = rng.randint(1, 90)
+        rows.append([
+            rng.choice(["CTR", "Conversion", "AOV", "Sign-ups", "Reach", "ROAS"]),
+            f"{baseline}%", f"{baseline + rng.randint(1, 9)}%", rng.choice(["Paid", "CRM", "Retail", "Brand"]),
+        ])
+    return rows
+
+def _wrap(text, width=CHARS_PER_LINE):
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+def brief_pages(pages, tables=False, seed=SEED):
+    """The brief as a list of pages, each a list of blocks: ("heading", text), ("paragraph", text) or ("table", rows)."""
+    rng = random.Random(f"{seed}:{pages}:{tables}")
+    result = []
+    section = 0
+    for _ in range(pages):
+        blocks, lines = [], 0
+        while True:
+            blocks.append(("heading", f"{section + 1}. {SECTIONS[section % len(SECTIONS)]}"))
+            section += 1
+            lines += 2
+            if tables:
+                blocks.append(("table", _table(rng)))
+                lines += _TABLE_ROWS + 3
+            while lines < LINES_PER_PAGE - 6:
+                paragraph = _paragraph(rng, rng.randint(3, 6))
+                blocks.append(("paragraph", paragraph))
+                lines += len(_wrap(paragraph)) + 1
+                if rng.random() < 0.3:
+                    break
+            if lines >= LINES_PER_PAGE - 6:
+                break
+        result.append(blocks)
+    return result
+
+def build_docx(pages, tables=False, seed=SEED):
+    """A DOCX brief of roughly ``pages`` pages, with a page break after each page."""
+    import docx
+
+    document = docx.Document()
+    for index, blocks in enumerate(brief_pages(pages, tables, seed)):
+        for kind, value in blocks:
+            if kind == "heading":
+                document.add_heading(value, level=2)
+            elif kind == "paragraph":
+                document.add_paragraph(value)
+            else:
+                table = document.add_table(rows=len(value), cols=len(value[0]))
+                for row, cells in zip(table.rows, value):
+                    for cell, text in zip(row.cells, cells):
+                        cell.text = text
+        if index < pages - 1:
+            document.add_page_break()
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _pdf_page_stream(blocks, page_number, page_count):
+    ops = ["BT /F1 8 Tf 72 760 Td (" + _pdf_escape(HEADER) + ") Tj ET"]
+    y = 730
+    for kind, value in blocks:
+        if kind == "heading":
+            y -= 6
+            ops.append(f"BT /F1 12 Tf 72 {y} Td ({_pdf_escape(value)}) Tj ET")
+            y -= 18
+        elif kind == "paragraph":
+            for line in _wrap(value):
+                ops.append(f"BT /F1 9 Tf 72 {y} Td ({_pdf_escape(line)}) Tj ET")
+                y -= 12
+            y -= 6
+        else:
+            width = 110
+            for row in value:
+                for column, text in enumerate(row):
+                    x = 72 + column * width
+                    ops.append(f"{x} {y - 4} {width} 14 re S")
+                    ops.append(f"BT /F1 9 Tf {x + 4} {y} Td ({_pdf_escape(text)}) Tj ET")
+                y -= 14
+            y -= 10
+    ops.append(f"BT /F1 8 Tf 280 40 Td (Page {page_number} of {page_count}) Tj ET")
+    return "\n".join(ops).encode("latin-1")
+
+def build_pdf(pages, tables=False, seed=SEED):
+    """A text-based PDF brief of exactly ``pages`` pages."""
+    page_blocks = brief_pages(pages, tables, seed)
+    # Objects 1-3 are the catalog, page tree and font; each page is a page object plus its content stream
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for number, blocks in enumerate(page_blocks, start=1):
+        stream = _pdf_page_stream(blocks, number, pages)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    output.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return output.getvalue()
+
+def corpus_name(kind, pages, tables):
+    return f"brief-{pages:03d}p{'-tables' if tables else ''}.{kind}"
+
+def build_corpus(sizes=DEFAULT_SIZES, directory=CORPUS_DIR):
+    """Writes (or reuses) every size and layout as DOCX and PDF; returns {file name: path}."""
+    directory = os.path.join(directory, f"v{CORPUS_VERSION}")
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for pages in sizes:
+        for tables in (False, True):
+            for kind, build in (("docx", build_docx), ("pdf", build_pdf)):
+                name = corpus_name(kind, pages, tables)
+                path = os.path.join(directory, name)
+                if not os.path.exists(path):
+                    data = build(pages, tables)
+                    with open(path + ".tmp", "wb") as file:
+                        file.write(data)
+                    os.replace(path + ".tmp", path)
+                paths[name] = path
+    return paths
+
+def brief_text(pages, tables=False, seed=SEED):
+    """Plain text of a generated brief, for stages that start after extraction."""
+    lines = []
+    for blocks in brief_pages(pages, tables, seed):
+        for kind, value in blocks:
+            if kind == "table":
+                lines.extend(" | ".join(row) for row in value)
+            else:
+                lines.append(value)
+    return "\n".join(lines)
+
+def response_fixtures(payload):
+    """A Gemini analysis response in the shapes the JSON parsing path has to handle."""
+    text = json.dumps(payload, indent=2)
+    return {
+        "valid": text,
+        "fenced": f"```json\n{text}\n```",
+        "trailing_comma": text[:-2] + ",\n}",
+        "truncated": text[: int(len(text) * 0.9)],
+    }
@@ -0,0 +1,120 @@
+"""A local stand-in for Gemini, for end-to-end benchmarks without network or quota.
+
+FakeModel answers with JSON generated from the call's response_schema (so
+analysis, re-ask, extraction and reduce calls all get well-typed answers),
+with properties in alphabetical order as Gemini fills them. JSON calls
+without a schema (the streamed analysis) get an analysis in the prompt's
+field order, and other calls plain text. Every call waits ``latency``
+seconds (plus up to ``jitter``), and a ``malformed_rate`` share of JSON
+answers is corrupted the way real responses go wrong: wrapped in a code
+fence, given a trailing comma, cut off, or missing a category. All choices come from a
+seeded RNG, so a run with the same settings makes the same calls.
+"""
+import asyncio
+import json
+import random
+
+REWRITE_TEXT = (
+    "Objective: grow online sales among adults aged 25-34 by 15% by the end of Q3.\n"
+    "Audience: outdoor enthusiasts in Boston and Denver who bought in the last two years.\n"
+    "KPIs: conversion rate, average order value and repeat purchase rate, reported weekly.\n"
+    "Channels: paid social on Instagram and TikTok, email nurture, and retail partners.\n"
+) * 6
+CORRUPTIONS = ("fenced", "trailing_comma", "truncated", "missing_category")
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeStream:
+    """Streams text in fixed-size chunks, like Gemini's async streamed response."""
+
+    def __init__(self, text, chunk_size, chunk_delay):
+        self.text = text
+        self._chunk_size = chunk_size
+        self._chunk_delay = chunk_delay
+
+    async def __aiter__(self):
+        for start in range(0, len(self.text), self._chunk_size):
+            if start and self._chunk_delay:
+                await asyncio.sleep(self._chunk_delay)
+            yield FakeResponse(self.text[start:start + self._chunk_size])
+
+class FakeModel:
+    def __init__(self, latency=0.05, jitter=0.0, malformed_rate=0.0, chunk_size=200, chunk_delay=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.malformed_rate = malformed_rate
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.seed = seed
+        self.reset()
+
+    def reset(self):
+        """Restarts the random sequence and call counts, so each timed run sees the same answers."""
+        self._rng = random.Random(self.seed)
+        self.calls = 0
+        self.corrupted = 0
+
+    def _value(self, schema, name="", sort_keys=False):
+        kind = str(schema.get("type", "string")).lower()
+        if kind == "object":
+            properties = schema.get("properties", {})
+            keys = sorted(properties) if sort_keys else properties
+            return {key: self._value(properties[key], key, sort_keys) for key in keys}
+        if kind == "array":
+            return [f"{name.replace('_', ' ')} {index + 1}" for index in range(self._rng.randint(1, 3))]
+        if kind == "integer":
+            return self._rng.randint(40, 95)
+        if kind == "number":
+            return round(self._rng.uniform(0, 1), 2)
+        if kind == "boolean":
+            return self._rng.random() < 0.5
+        return f"Generated {name.replace('_', ' ') or 'text'} for the benchmark brief."
+
+    def _corrupt(self, data):
+        options = list(CORRUPTIONS)
+        if not isinstance(data.get("breakdown"), dict) or len(data["breakdown"]) < 2:
+            options.remove("missing_category")
+        corruption = self._rng.choice(options)
+        if corruption == "missing_category":
+            data = {**data, "breakdown": dict(list(data["breakdown"].items())[1:])}
+        text = json.dumps(data, indent=2)
+        if corruption == "fenced":
+            return f"```json\n{text}\n```"
+        if corruption == "trailing_comma":
+            return text[:-2] + ",\n}"
+        if corruption == "truncated":
+            return text[: int(len(text) * 0.9)]
+        return text
+
+    def answer(self, generation_config=None):
+        """The text of the next response for a call with this generation_config."""
+        self.calls += 1
+        config = generation_config or {}
+        if config.get("response_schema") is not None:
+            data = self._value(config["response_schema"], sort_keys=True)
+        elif config.get("response_mime_type") == "application/json":
+            from ai_analysis import analysis_schema
+            data = self._value(analysis_schema())
+        else:
+            return REWRITE_TEXT
+        if self._rng.random() < self.malformed_rate:
+            self.corrupted += 1
+            return self._corrupt(data)
+        return json.dumps(data)
+
+    async def generate_content_async(self, prompt, stream=False, generation_config=None, **kwargs):
+        text = self.answer(generation_config)
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        return FakeStream(text, self.chunk_size, self.chunk_delay) if stream else FakeResponse(text)
+
+def install(model):
+    """Routes every Gemini call in this process to ``model`` and lifts the shared rate limits."""
+    import gemini_client
+    import rate_limiter
+
+    gemini_client.get_model = lambda operation="analysis", model_name=None: model
+    rate_limiter.configure(0, 0, None)
@@ -0,0 +1,336 @@
+"""Benchmarks for Briefly's processing stages and end-to-end flows.
+
+Usage:
+    python -m benchmarks.run [--quick] [-o results.json]
+    python -m benchmarks.run --baseline baseline.json [--max-regression 0.15]
+
+Times text extraction (DOCX and PDF, 1 to 300 pages, with and without
+tables), sentiment scoring, JSON response parsing and suggestion building
+on a generated corpus. It also runs end-to-end analyses against a local
+fake Gemini with configurable latency and malformed-output rate. Every
+input is generated from a fixed seed and every cache is bypassed, so two
+runs on the same machine measure the same work. Each benchmark reports the
+median of ``--repeat`` runs after a warm-up. With ``--baseline`` the run
+fails when any median is more than ``--max-regression`` slower than the
+baseline's.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from itertools import count
+
+from benchmarks import corpus
+from benchmarks.fake_gemini import FakeModel, install
+
+# Version of the benchmark set and result format; comparisons across versions are refused
+BENCHMARK_VERSION = "1"
+QUICK_SIZES = (1, 10)
+# Slowdowns smaller than this many seconds are treated as noise, whatever the ratio
+NOISE_FLOOR_SECONDS = 0.0002
+# Pages in the documents used by the end-to-end flows
+E2E_PAGES = 10
+LONG_E2E_PAGES = 50
+BATCH_SIZE = 8
+# Pages in the table PDF that check_extraction runs against
+CHECK_PAGES = 10
+
+def measure(function, repeat=5, warmup=1, setup=None):
+    """Seconds taken by each of ``repeat`` calls after ``warmup`` untimed ones.
+
+    ``setup`` runs untimed before every call. Garbage collection is paused
+    during each call, as timeit does, and the app's console output is
+    swallowed so printing does not skew the timings.
+    """
+    samples = []
+    for index in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        gc.disable()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                function()
+                elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        if index >= warmup:
+            samples.append(elapsed)
+    return samples
+
+def summarize(samples):
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "runs": len(samples),
+    }
+
+def _calibration_workload():
+    data = [(index * 7919) % 10007 for index in range(200_000)]
+    json.loads(json.dumps(sorted(data)))
+    " ".join(str(value) for value in data).split()
+
+def calibrate(repeat=5):
+    """Median time of a fixed CPU-bound workload, for comparing runs made on different machines."""
+    return statistics.median(measure(_calibration_workload, repeat))
+
+def stage_benchmarks(sizes, paths):
+    """(name, function, setup) for each single-stage benchmark."""
+    from ai_analysis import analysis_schema, parse_response
+    from analysis_result import AnalysisResult
+    from json_repair import repair_json
+    from sentiment_analysis import analyze_section_sentiment, analyze_sentiment, sentiment_cache
+    from text_extraction import extract_text_from_docx, extract_text_from_pdf
+    from utils import clean_response, parse_and_improve, parse_and_improve_batch
+
+    for pages in sizes:
+        for tables in (False, True):
+            layout = f"{pages}p{'-tables' if tables else ''}"
+            for kind, extract in (("docx", extract_text_from_docx), ("pdf", extract_text_from_pdf)):
+                with open(paths[corpus.corpus_name(kind, pages, tables)], "rb") as file:
+                    data = file.read()
+                yield f"extract_{kind}/{layout}", lambda extract=extract, data=data: extract(data), None
+
+    for pages in sizes:
+        text = corpus.brief_text(pages)
+        yield f"sentiment/{pages}p", lambda text=text: analyze_sentiment(text), sentiment_cache.clear
+        yield f"section_sentiment/{pages}p", lambda text=text: analyze_section_sentiment(text), sentiment_cache.clear
+
+    payload = json.loads(FakeModel(seed=corpus.SEED).answer({"response_schema": analysis_schema()}))
+    for shape, text in corpus.response_fixtures(payload).items():
+        yield (
+            f"json_repair/{shape}",
+            lambda text=text: json.loads(repair_json(clean_response(text))),
+            None,
+        )
+        yield f"parse_response/{shape}", lambda text=text: parse_response(text), None
+
+    analysis = AnalysisResult.from_response(payload)
+    yield "parse_and_improve/1", lambda: parse_and_improve(analysis), None
+    analyses = [analysis] * 100
+    yield "parse_and_improve_batch/100", lambda: parse_and_improve_batch(analyses), None
+
+def end_to_end_benchmarks(model):
+    """(name, function, setup) for flows that call the fake model.
+
+    Each run appends a per-process nonce and run number to the brief so it
+    misses the analysis caches and the result store, and resets the model so every run gets the
+    same sequence of answers (and corruptions).
+    """
+    import event_loop
+    from ai_analysis import analyze_text_async, analyze_text_stream, rewrite_brief
+    from analysis_cache import analysis_cache
+    from batch_analysis import analyze_batch
+    from sentiment_analysis import analyze_section_sentiment, analyze_sentiment, sentiment_cache
+    from text_extraction import extract_text_from_docx
+    from utils import parse_and_improve
+
+    runs = count()
+    nonce = uuid.uuid4().hex
+    text = corpus.brief_text(E2E_PAGES)
+    long_text = corpus.brief_text(LONG_E2E_PAGES)
+    docx_data = corpus.build_docx(E2E_PAGES, tables=True)
+
+    def setup():
+        model.reset()
+        analysis_cache.clear()
+        sentiment_cache.clear()
+
+    def unique(document):
+        return f"{document}\nBenchmark run {nonce}-{next(runs)}."
+
+    def analyze():
+        event_loop.run(analyze_text_async(unique(text)))
+
+    def analyze_stream():
+        for _ in event_loop.iterate(analyze_text_stream(unique(text))):
+            pass
+
+    def analyze_long():
+        event_loop.run(analyze_text_async(unique(long_text)))
+
+    def analyze_many():
+        documents = [(f"brief-{index}.docx", unique(text)) for index in range(BATCH_SIZE)]
+        for _ in event_loop.iterate(analyze_batch(documents)):
+            pass
+
+    def full_flow():
+        # The app's path for one upload: extract, sentiment, analyze, suggestions, rewrite
+        document = unique(extract_text_from_docx(docx_data))
+        analyze_sentiment(document)
+        analyze_section_sentiment(document)
+        analysis = event_loop.run(analyze_text_async(document))
+        parse_and_improve(analysis)
+        rewrite_brief(document, analysis)
+
+    yield f"e2e_analyze/{E2E_PAGES}p", analyze, setup
+    yield f"e2e_analyze_stream/{E2E_PAGES}p", analyze_stream, setup
+    yield f"e2e_analyze_long/{LONG_E2E_PAGES}p", analyze_long, setup
+    yield f"e2e_batch/{BATCH_SIZE}x{E2E_PAGES}p", analyze_many, setup
+    yield f"e2e_full_flow/{E2E_PAGES}p-docx", full_flow, setup
+
+def check_extraction(pages=CHECK_PAGES):
+    """Problems with the text extracted from the corpus's table PDF; an empty list when it is correct.
+
+    Header/footer removal must drop the page header and "Page n of N" lines
+    but keep every table's header row, which repeats near the top of most pages.
+    """
+    from text_extraction import extract_text_from_pdf
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        text = extract_text_from_pdf(corpus.build_pdf(pages, tables=True))
+    tables = sum(kind == "table" for blocks in corpus.brief_pages(pages, tables=True) for kind, _ in blocks)
+    header_row = " ".join(corpus.TABLE_HEADER)
+    problems = []
+    if text.count(header_row) != tables:
+        problems.append(f"expected {tables} '{header_row}' rows, found {text.count(header_row)}")
+    if corpus.HEADER in text:
+        problems.append("the repeated page header was not removed")
+    if f"Page 2 of {pages}" in text:
+        problems.append("page number footers were not removed")
+    return problems
+
+@contextlib.contextmanager
+def throwaway_stores():
+    """Points the app's result store at a temporary file and turns off the extraction store.
+
+    The stores read their paths from the environment when first imported, so
+    the already-created store objects are repointed rather than the variables set.
+    """
+    import result_store
+    import text_extraction
+
+    store = result_store.result_store
+    saved = store.path, store._initialized, text_extraction.extraction_store
+    with tempfile.TemporaryDirectory() as store_dir:
+        store.path, store._initialized = os.path.join(store_dir, "results.sqlite3"), False
+        text_extraction.extraction_store = None
+        try:
+            yield
+        finally:
+            store.path, store._initialized, text_extraction.extraction_store = saved
+
+def run_benchmarks(args):
+    """Runs every selected benchmark and returns the results document."""
+    paths = corpus.build_corpus(args.sizes)
+    model = FakeModel(args.llm_latency, args.llm_jitter, args.malformed_rate, seed=args.seed)
+    install(model)
+
+    benchmarks = []
+    if not args.e2e_only:
+        benchmarks.extend(stage_benchmarks(args.sizes, paths))
+    if not args.stages_only:
+        benchmarks.extend(end_to_end_benchmarks(model))
+
+    results = {}
+    for name, function, setup in benchmarks:
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = summarize(measure(function, args.repeat, args.warmup, setup))
+        print(_format_row(name, results[name]), flush=True)
+
+    return {
+        "version": BENCHMARK_VERSION,
+        "corpus_version": corpus.CORPUS_VERSION,
+        "settings": {
+            "repeat": args.repeat, "llm_latency": args.llm_latency, "llm_jitter": args.llm_jitter,
+            "malformed_rate": args.malformed_rate, "seed": args.seed,
+        },
+        "machine": {
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+        },
+        "calibration": calibrate(),
+        "results": results,
+    }
+
+def _format_row(name, result, change=None):
+    row = f"{name:<40} {result['median'] * 1000:>10.2f} ms  (min {result['min'] * 1000:.2f}, sd {result['stdev'] * 1000:.2f})"
+    if change is not None:
+        row += f"  {change:+.1%}"
+    return row
+
+def compare(current, baseline, max_regression, normalize=False):
+    """Prints each benchmark's change against the baseline and returns the names that regressed.
+
+    With ``normalize``, medians are first divided by each run's calibration
+    time, which factors out a faster or slower machine.
+    """
+    if baseline.get("version") != current["version"] or baseline.get("corpus_version") != current["corpus_version"]:
+        raise ValueError("Baseline was produced by a different benchmark or corpus version; re-record it.")
+    if baseline.get("settings") != current["settings"]:
+        print("Warning: baseline was recorded with different settings; changes may not be comparable")
+
+    scale = baseline["calibration"] / current["calibration"] if normalize else 1.0
+    regressions = []
+    print(f"\nChange against baseline{' (normalized by calibration)' if normalize else ''}:")
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            print(f"{name:<40} new")
+            continue
+        old, new = previous["median"], result["median"] * scale
+        change = (new - old) / old if old else 0.0
+        regressed = change > max_regression and new - old > NOISE_FLOOR_SECONDS
+        print(_format_row(name, result, change) + ("  REGRESSION" if regressed else ""))
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Briefly's processing stages against a generated corpus.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(corpus.DEFAULT_SIZES), help="Document sizes in pages")
+    parser.add_argument("--quick", action="store_true", help=f"Only {' and '.join(map(str, QUICK_SIZES))}-page documents, 3 runs each")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark; the median is reported")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs before timing each benchmark")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--stages-only", action="store_true", help="Skip the end-to-end flows")
+    parser.add_argument("--e2e-only", action="store_true", help="Skip the single-stage benchmarks")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds the fake model takes per call")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="Extra random latency per call, up to this many seconds")
+    parser.add_argument("--malformed-rate", type=float, default=0.1, help="Share of fake JSON responses that are corrupted")
+    parser.add_argument("--seed", type=int, default=corpus.SEED, help="Seed for the fake model's answers")
+    parser.add_argument("--check-only", action="store_true", help="Only run the extraction correctness check")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file (e.g. to use as a baseline)")
+    parser.add_argument("--baseline", help="Results JSON to compare against; exits 1 on a regression")
+    parser.add_argument("--max-regression", type=float, default=0.15, help="Allowed slowdown of a median, as a fraction")
+    parser.add_argument("--normalize", action="store_true", help="Scale by the calibration workload when the baseline comes from another machine")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.sizes, args.repeat = list(QUICK_SIZES), 3
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    # Earlier runs and the app's own stores are never read or written
+    with throwaway_stores():
+        problems = check_extraction()
+        for problem in problems:
+            print(f"Extraction check failed: {problem}")
+        if problems or args.check_only:
+            return 1 if problems else 0
+        results = run_benchmarks(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.max_regression, args.normalize)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.max_regression:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Headless batch analyzer for directories of marketing briefs.
+
+Usage:
+    python briefly_cli.py briefs/ "archive/**/*.pdf" -o results.jsonl
+
+Results are appended to the output file as one JSON object per line. Files
+that already have a successful record in the output are skipped, so an
+interrupted run can simply be restarted with the same arguments.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_analysis import extract_text
+from ai_analysis import analyze_text_async
+import rate_limiter
+from sentiment_analysis import analyze_sentiment
+from utils import parse_and_improve_batch
+
+SUPPORTED_EXTENSIONS = (".docx", ".pdf")
+
+def find_briefs(patterns):
+    """Expands directories and glob patterns into a sorted list of brief paths."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, file_names in os.walk(pattern):
+                for file_name in file_names:
+                    paths.add(os.path.join(root, file_name))
+        else:
+            paths.update(glob.glob(pattern, recursive=True))
+    return sorted(path for path in paths if path.lower().endswith(SUPPORTED_EXTENSIONS))
+
+def load_completed(output_path):
+    """Returns the set of files that already have a successful record in the output."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written line from an interrupted run
+            if "error" not in record:
+                completed.add(record["file"])
+    return completed
+
+def extract_file(path):
+    """Extracts a brief straight from disk; runs in a worker process."""
+    return extract_text(path, path)
+
+def build_record(path, text, analysis, insights):
+    if analysis is None:
+        return {"file": path, "error": "Gemini response could not be parsed"}
+
+    polarity, subjectivity = analyze_sentiment(text)
+    return {
+        "file": path,
+        "overall_score": analysis.overall_score,
+        "breakdown": {title: category.to_row() for title, category in analysis.categories.items()},
+        "gap_analysis": list(analysis.gap_analysis),
+        "competitors_mentioned": list(analysis.competitors_mentioned),
+        "sentiment": {"polarity": polarity, "subjectivity": subjectivity},
+        "insights": insights,
+    }
+
+def build_records(results):
+    """Records for a batch of (path, text, analysis, error) results, with insights built in one pass."""
+    insights = parse_and_improve_batch([analysis for _, _, analysis, _ in results])
+    return [
+        {"file": path, "error": error} if error else build_record(path, text, analysis, brief_insights)
+        for (path, text, analysis, error), brief_insights in zip(results, insights)
+    ]
+
+async def process_briefs(paths, output, workers, concurrency):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(pool, path):
+        try:
+            text = await loop.run_in_executor(pool, extract_file, path)
+            if text is None:
+                return path, None, None, "Failed to extract text"
+            # Gemini calls are paced by the shared rate limiter in gemini_client
+            async with semaphore:
+                analysis = await analyze_text_async(text)
+            return path, text, analysis, None
+        except Exception as e:
+            return path, None, None, str(e)
+
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {asyncio.create_task(process(pool, path)) for path in paths}
+        while pending:
+            # Everything that finished since the last wake-up is written as one batch
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for record in build_records([task.result() for task in finished]):
+                output.write(json.dumps(record, default=str) + "\n")
+                done += 1
+                status = "error: " + record["error"] if "error" in record else record["overall_score"]
+                print(f"[{done}/{len(paths)}] {record['file']}: {status}", file=sys.stderr)
+            output.flush()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score marketing briefs without the Streamlit UI.")
+    parser.add_argument("paths", nargs="+", help="Directories or glob patterns of DOCX/PDF briefs")
+    parser.add_argument("-o", "--output", default="briefly_results.jsonl", help="JSONL file to append results to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes used for text extraction")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum Gemini calls in flight")
+    parser.add_argument("--rpm", type=float, default=rate_limiter.REQUESTS_PER_MINUTE, help="Maximum Gemini calls started per minute (0 for no limit)")
+    parser.add_argument("--tpm", type=float, default=rate_limiter.TOKENS_PER_MINUTE, help="Maximum estimated Gemini tokens per minute (0 for no limit)")
+    parser.add_argument("--no-resume", action="store_true", help="Re-process files already present in the output")
+    args = parser.parse_args(argv)
+
+    paths = find_briefs(args.paths)
+    if not args.no_resume:
+        completed = load_completed(args.output)
+        paths = [path for path in paths if path not in completed]
+    print(f"{len(paths)} briefs to process", file=sys.stderr)
+    if not paths:
+        return 0
+
+    rate_limiter.configure(args.rpm, args.tpm)
+    with open(args.output, "a", encoding="utf-8") as output:
+        asyncio.run(process_briefs(paths, output, args.workers, args.concurrency))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
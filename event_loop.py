@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+# One event loop per process, shared by every Streamlit session and rerun.
+# Async Gemini clients bind to the loop they were first used on, so creating
+# a fresh loop per rerun (asyncio.run) would both waste time and break them.
+_loop = None
+_lock = threading.Lock()
+
+def get_loop():
+    """Returns the process-wide event loop, starting its thread on first use."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="briefly-event-loop", daemon=True)
+            thread.start()
+        return _loop
+
+def run(coro, timeout=None):
+    """Runs a coroutine on the shared loop and blocks until it finishes.
+
+    If ``timeout`` seconds pass first, the coroutine is cancelled and
+    TimeoutError is raised.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+    except BaseException:
+        # e.g. Streamlit stopping the script: don't leave the call running
+        future.cancel()
+        raise
+
+async def _next_item(iterator):
+    return await iterator.__anext__()
+
+def iterate(async_iterable, timeout=None):
+    """Consumes an async iterable on the shared loop from synchronous code.
+
+    Items are yielded in the calling thread, so Streamlit elements can be
+    rendered as each one arrives.
+    """
+    iterator = async_iterable.__aiter__()
+    while True:
+        try:
+            yield run(_next_item(iterator), timeout)
+        except StopAsyncIteration:
+            return
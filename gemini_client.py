@@ -0,0 +1,265 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+import event_loop
+from long_document import CHARS_PER_TOKEN
+from rate_limiter import scheduler
+from telemetry import STAGE_METRIC, log_event, observe, span
+
+DEFAULT_MODEL_NAME = "gemini-1.5-flash"
+# Model used for each kind of call; override per operation with e.g. BRIEFLY_REWRITE_MODEL
+MODEL_NAMES = {
+    "analysis": os.environ.get("BRIEFLY_ANALYSIS_MODEL", DEFAULT_MODEL_NAME),
+    "extraction": os.environ.get("BRIEFLY_EXTRACTION_MODEL", DEFAULT_MODEL_NAME),
+    "rewrite": os.environ.get("BRIEFLY_REWRITE_MODEL", DEFAULT_MODEL_NAME),
+}
+
+# Alternate model tried when the primary reports overload (429/503); empty disables fallback
+FALLBACK_MODEL_NAME = os.environ.get("BRIEFLY_FALLBACK_MODEL", "gemini-1.5-flash-8b")
+
+# Retry policy for a single logical call; all attempts share one deadline
+CALL_TIMEOUT = float(os.environ.get("BRIEFLY_CALL_TIMEOUT", 60))
+MAX_ATTEMPTS = int(os.environ.get("BRIEFLY_MAX_ATTEMPTS", 4))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Hedging fires a duplicate request once the first has run longer than the
+# operation's recent p95 latency, and takes whichever answers first
+HEDGING_ENABLED = os.environ.get("BRIEFLY_HEDGING", "0") == "1"
+HEDGE_DEFAULT_DELAY = 8.0
+HEDGE_MIN_SAMPLES = 20
+
+# Output tokens charged to the rate limiter per call on top of the prompt estimate
+EXPECTED_OUTPUT_TOKENS = 1000
+
+_api_configured = False
+_models = {}
+_lock = threading.Lock()
+
+def model_name_for(operation):
+    return MODEL_NAMES.get(operation, DEFAULT_MODEL_NAME)
+
+def configure_api():
+    """Configures Gemini from Streamlit secrets, falling back to the GOOGLE_API_KEY env var."""
+    global _api_configured
+    with _lock:
+        if _api_configured:
+            return
+
+        try:
+            api_key = st.secrets["api_keys"]["GOOGLE_API_KEY"]
+        except Exception:
+            api_key = os.environ.get("GOOGLE_API_KEY")
+        if not api_key:
+            raise RuntimeError("No Gemini API key found in Streamlit secrets or GOOGLE_API_KEY.")
+
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        _api_configured = True
+
+def _create_model(model_name):
+    configure_api()
+    import google.generativeai as genai
+    return genai.GenerativeModel(model_name=model_name)
+
+@st.cache_resource(show_spinner=False)
+def _streamlit_model(model_name):
+    return _create_model(model_name)
+
+def get_model(operation="analysis", model_name=None):
+    """Returns the shared model handle for an operation ("analysis", "extraction" or "rewrite").
+
+    Handles are created once per process and model name. A GenerativeModel
+    keeps its sync and async clients after first use, so sharing handles
+    reuses their gRPC channels across calls and sessions. Inside a running
+    Streamlit app the handle is held as a cache_resource; elsewhere (CLI,
+    worker scripts) in a module-level registry.
+    """
+    model_name = model_name or model_name_for(operation)
+
+    from streamlit import runtime
+    if runtime.exists():
+        return _streamlit_model(model_name)
+
+    with _lock:
+        model = _models.get(model_name)
+    if model is None:
+        model = _create_model(model_name)
+        with _lock:
+            model = _models.setdefault(model_name, model)
+    return model
+
+# --- Deadline-aware calls with retries, hedging and fallback ---
+_latencies = {}  # Recent successful call durations per operation
+
+def _record_latency(operation, seconds):
+    with _lock:
+        _latencies.setdefault(operation, deque(maxlen=200)).append(seconds)
+
+def hedge_delay(operation):
+    """Seconds to wait before hedging: the p95 of recent latencies, or a default until enough samples exist."""
+    with _lock:
+        samples = sorted(_latencies.get(operation, ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_DELAY
+    return samples[int(len(samples) * 0.95) - 1]
+
+def _is_retryable(error):
+    from google.api_core import exceptions
+    return isinstance(error, (
+        exceptions.TooManyRequests, exceptions.ServiceUnavailable, exceptions.InternalServerError,
+        exceptions.DeadlineExceeded, exceptions.GatewayTimeout, ConnectionError,
+    ))
+
+def _is_overloaded(error):
+    from google.api_core import exceptions
+    return isinstance(error, (exceptions.TooManyRequests, exceptions.ServiceUnavailable))
+
+def _backoff(attempt):
+    # Full jitter keeps retries from concurrent sessions from arriving in lockstep
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+async def _first_success(tasks):
+    """Returns the first successful result among tasks, or raises the last error."""
+    pending = set(tasks)
+    while True:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                return task.result()
+            if not pending:
+                raise task.exception()
+
+class _TimedStream:
+    """A streamed response that records time to first chunk and to the end of the stream.
+
+    Both are measured from the start of the call, so they include opening the
+    stream; everything other than iteration is passed through to the response.
+    """
+
+    def __init__(self, response, operation, start):
+        self._response = response
+        self._operation = operation
+        self._start = start
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    async def __aiter__(self):
+        first = True
+        try:
+            async for chunk in self._response:
+                if first:
+                    observe(STAGE_METRIC, time.monotonic() - self._start, stage="llm_first_token", operation=self._operation)
+                    first = False
+                yield chunk
+        finally:
+            observe(STAGE_METRIC, time.monotonic() - self._start, stage="llm_stream", operation=self._operation)
+
+def estimate_call_tokens(prompt):
+    return len(prompt) // CHARS_PER_TOKEN + EXPECTED_OUTPUT_TOKENS
+
+async def _attempt(operation, model_name, prompt, hedge, kwargs):
+    model = get_model(operation, model_name)
+    start = time.monotonic()
+    tasks = [asyncio.ensure_future(model.generate_content_async(prompt, **kwargs))]
+    try:
+        if hedge:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay(operation))
+            # Hedges are optional, so they only use spare budget and never queue
+            if not done and await scheduler.try_acquire(estimate_call_tokens(prompt)):
+                tasks.append(asyncio.ensure_future(model.generate_content_async(prompt, **kwargs)))
+        response = await _first_success(tasks)
+    finally:
+        # Drop the losing hedge, or everything if the deadline cancelled us
+        for task in tasks:
+            task.cancel()
+    _record_latency(operation, time.monotonic() - start)
+    return response
+
+async def generate_async(operation, prompt, timeout=CALL_TIMEOUT, hedge=None, user_id="default", on_queue=None, **kwargs):
+    """Calls Gemini for an operation within a deadline of ``timeout`` seconds.
+
+    Every request first waits for a slot from the shared rate limiter, queued
+    fairly against other users' calls; ``on_queue`` receives the queue
+    position while waiting. Time spent queued before the first attempt does
+    not count against the deadline. Retryable errors (429, 5xx, transport failures) are retried with
+    jittered exponential backoff while time remains; after an overload
+    error the remaining attempts go to FALLBACK_MODEL_NAME. With hedging
+    on, a duplicate request is fired after the operation's p95 latency.
+    Streaming calls (``stream=True``) are retried only while opening the
+    stream and are never hedged. The response's ``served_by`` names the
+    model that answered. Raises TimeoutError once the deadline passes.
+    """
+    if hedge is None:
+        hedge = HEDGING_ENABLED and not kwargs.get("stream")
+    loop = asyncio.get_running_loop()
+    tokens = estimate_call_tokens(prompt)
+    with span("queue_wait", operation=operation):
+        await scheduler.acquire(user_id, tokens, on_queue)
+    start = time.monotonic()
+    deadline = loop.time() + timeout
+    model_name = model_name_for(operation)
+
+    with span("llm_call", operation=operation, attempts=0) as labels:
+        for attempt in range(MAX_ATTEMPTS):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            labels["attempts"] = attempt + 1
+            try:
+                if attempt:
+                    await asyncio.wait_for(scheduler.acquire(user_id, tokens), remaining)
+                    remaining = deadline - loop.time()
+                response = await asyncio.wait_for(_attempt(operation, model_name, prompt, hedge, kwargs), remaining)
+                if kwargs.get("stream"):
+                    response = _TimedStream(response, operation, start)
+                response.served_by = model_name
+                return response
+            except TimeoutError:
+                break
+            except Exception as e:
+                if attempt == MAX_ATTEMPTS - 1 or not _is_retryable(e):
+                    raise
+                if _is_overloaded(e) and FALLBACK_MODEL_NAME:
+                    model_name = FALLBACK_MODEL_NAME
+                delay = _backoff(attempt)
+                if loop.time() + delay >= deadline:
+                    raise
+                log_event("retry", operation=operation, model=model_name, delay=round(delay, 1), error=str(e))
+                await asyncio.sleep(delay)
+
+    raise TimeoutError(f"Gemini {operation} call did not complete within {timeout:g}s")
+
+def fallback_model(operation, response):
+    """The model that answered ``response`` if it was not the operation's own (i.e. the fallback), else None."""
+    served_by = getattr(response, "served_by", None)
+    return served_by if served_by not in (None, model_name_for(operation)) else None
+
+async def generate_with_updates(operation, prompt, timeout=CALL_TIMEOUT, user_id="default", **kwargs):
+    """Runs generate_async, yielding ("queued", position) while it waits for a slot and finally ("response", response)."""
+    positions = asyncio.Queue()
+    call = asyncio.ensure_future(
+        generate_async(operation, prompt, timeout, user_id=user_id, on_queue=positions.put_nowait, **kwargs)
+    )
+    try:
+        while not call.done():
+            next_position = asyncio.ensure_future(positions.get())
+            await asyncio.wait({call, next_position}, return_when=asyncio.FIRST_COMPLETED)
+            if next_position.done():
+                yield ("queued", next_position.result())
+            else:
+                next_position.cancel()
+        yield ("response", call.result())
+    finally:
+        call.cancel()
+
+def generate(operation, prompt, timeout=CALL_TIMEOUT, hedge=None, user_id="default", **kwargs):
+    """Blocking generate_async, run on the shared event loop."""
+    return event_loop.run(generate_async(operation, prompt, timeout, hedge, user_id, **kwargs))
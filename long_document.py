@@ -0,0 +1,172 @@
+import os
+import re
+
+from telemetry import span
+
+# Rough characters-per-token ratio for English prose with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+# Documents above this estimate are analyzed with map-reduce instead of one prompt
+LONG_DOCUMENT_TOKENS = int(os.environ.get("BRIEFLY_LONG_DOCUMENT_TOKENS", 12000))
+CHUNK_TOKENS = int(os.environ.get("BRIEFLY_CHUNK_TOKENS", 4000))
+
+# Lists extracted from every chunk, mapped onto the analysis schema fields they feed
+EXTRACTED_FIELDS = {
+    "objectives": ("clarity_of_objectives", "extracted_objectives"),
+    "kpis": ("key_performance_indicators", "extracted_kpis"),
+    "competitors": ("competitive_analysis", "competitors_mentioned"),
+    "channels": ("channel_strategy", "recommended_channels"),
+    "demographics": ("target_audience_definition", "extracted_demographics"),
+    "target_locations": ("target_audience_definition", "target_locations"),
+}
+
+# Gemini response_schema for generate_extraction_prompt's response format
+EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        **{field: {"type": "array", "items": {"type": "string"}} for field in EXTRACTED_FIELDS},
+    },
+    "required": ["summary", *EXTRACTED_FIELDS],
+}
+
+_HEADING_RE = re.compile(r"^(\d+(\.\d+)*[.)]?\s+\S.*|[A-Z][A-Z0-9 &/,'-]{2,}|.{1,80}:)$")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN
+
+def is_long_document(text):
+    return estimate_tokens(text) > LONG_DOCUMENT_TOKENS
+
+def split_sections(text):
+    """Splits text into sections, starting a new one at each heading-like line."""
+    sections = []
+    current = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if current and stripped and len(stripped) <= 80 and _HEADING_RE.match(stripped):
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current))
+    return [section for section in sections if section.strip()]
+
+def _split_oversized(section, max_chars):
+    """Breaks a section that exceeds the budget at paragraph, then sentence boundaries."""
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", section):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END_RE.split(paragraph):
+            # A single run-on "sentence" is cut into fixed windows as a last resort
+            for start in range(0, len(sentence), max_chars):
+                pieces.append(sentence[start:start + max_chars])
+    return pieces
+
+def split_into_chunks(text, max_tokens=CHUNK_TOKENS):
+    """Packs whole sections into chunks of at most ``max_tokens`` estimated tokens."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    for section in split_sections(text):
+        if len(section) > max_chars:
+            pieces.extend(_split_oversized(section, max_chars))
+        else:
+            pieces.append(section)
+
+    chunks = []
+    current = []
+    current_chars = 0
+    for piece in pieces:
+        if current and current_chars + len(piece) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current = []
+            current_chars = 0
+        current.append(piece)
+        current_chars += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+@span("prompt_build", kind="extraction")
+def generate_extraction_prompt(chunk, index, total):
+    return f"""
+    ## Marketing Brief Extraction Request
+
+    The following is part {index + 1} of {total} of a long marketing brief. Extract only what this part states;
+    do not guess at content from other parts. Use empty lists when nothing relevant is present.
+
+    **Brief Excerpt:**
+
+    ```
+    {chunk}
+    ```
+
+    **Response Format:**
+
+    ```json
+    {{
+      "summary": "two or three sentences summarizing this part",
+      "objectives": ["campaign or business objectives"],
+      "kpis": ["KPIs or success metrics"],
+      "competitors": ["competitor brands"],
+      "channels": ["marketing channels"],
+      "demographics": ["target audience demographics"],
+      "target_locations": ["target locations or markets"]
+    }}
+    ```
+    """
+
+def _dedupe(items):
+    """Removes case/whitespace-insensitive duplicates, keeping first occurrences in order."""
+    seen = set()
+    unique = []
+    for item in items:
+        if not isinstance(item, str):
+            continue
+        key = " ".join(item.lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(item.strip())
+    return unique
+
+def merge_extractions(extractions):
+    """Combines per-chunk extractions into ordered summaries and deduplicated lists."""
+    merged = {"summaries": [extraction.get("summary", "") for extraction in extractions]}
+    for field in EXTRACTED_FIELDS:
+        merged[field] = _dedupe(item for extraction in extractions for item in extraction.get(field, []))
+    return merged
+
+@span("prompt_build", kind="reduce")
+def generate_reduce_prompt(merged, response_format):
+    summaries = "\n".join(f"{i + 1}. {summary}" for i, summary in enumerate(merged["summaries"]) if summary)
+    facts = "\n".join(
+        f"- {field.replace('_', ' ').title()}: {'; '.join(merged[field]) or 'none found'}"
+        for field in EXTRACTED_FIELDS
+    )
+    return f"""
+    ## Marketing Brief Analysis Request
+
+    A long marketing brief was split into parts and each part was summarized and mined for key details.
+    Using only this material, analyze the brief as a whole and provide a structured response suitable for
+    Python processing, with scores as numbers out of 100.
+
+    **Part Summaries (in document order):**
+
+    {summaries}
+
+    **Details Extracted Across All Parts:**
+
+    {facts}
+
+{response_format}"""
+
+def apply_extractions(response_data, merged):
+    """Folds the deduplicated extracted lists into the reduced analysis."""
+    breakdown = response_data.get("breakdown", {})
+    for field, (category, key) in EXTRACTED_FIELDS.items():
+        if category in breakdown:
+            details = breakdown[category]
+            details[key] = _dedupe(merged[field] + list(details.get(key, [])))
+    return response_data
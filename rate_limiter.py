@@ -0,0 +1,198 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from telemetry import log_event
+
+# Provider quota to stay under, shared by every session in the process (or
+# every process, when BRIEFLY_RATE_LIMIT_DB points them at one SQLite file)
+REQUESTS_PER_MINUTE = float(os.environ.get("BRIEFLY_REQUESTS_PER_MINUTE", 1000))
+TOKENS_PER_MINUTE = float(os.environ.get("BRIEFLY_TOKENS_PER_MINUTE", 2_000_000))
+RATE_LIMIT_DB = os.environ.get("BRIEFLY_RATE_LIMIT_DB")
+
+# Longest a waiter sleeps before re-checking, to notice refills by other processes
+_MAX_POLL_SECONDS = 1.0
+
+class LocalBuckets:
+    """In-process token buckets, each refilled continuously up to one minute's budget.
+
+    A limit of 0 (or less) leaves that bucket unlimited.
+    """
+
+    # reserve only takes an uncontended in-memory lock, so it is called directly on the loop
+    blocking = False
+
+    def __init__(self, limits_per_minute):
+        now = time.monotonic()
+        self.limits = {name: limit for name, limit in limits_per_minute.items() if limit > 0}
+        self._levels = {name: (limit, now) for name, limit in self.limits.items()}
+        self._lock = threading.Lock()
+
+    def reserve(self, amounts):
+        """Takes all amounts at once and returns 0, or returns the seconds until that is possible."""
+        with self._lock:
+            now = time.monotonic()
+            levels = {}
+            wait = 0.0
+            amounts = {name: amount for name, amount in amounts.items() if name in self.limits}
+            for name, amount in amounts.items():
+                limit = self.limits[name]
+                level, updated = self._levels[name]
+                level = min(limit, level + (now - updated) * limit / 60.0)
+                levels[name] = level
+                amount = min(amount, limit)  # A request larger than the bucket waits for a full one
+                if level < amount:
+                    wait = max(wait, (amount - level) * 60.0 / limit)
+            if wait > 0:
+                return wait
+            for name, amount in amounts.items():
+                self._levels[name] = (levels[name] - min(amount, self.limits[name]), now)
+            return 0.0
+
+class SqliteBuckets:
+    """Token buckets kept in a SQLite file so several app processes share one budget."""
+
+    # reserve waits on a file lock (up to its busy timeout), so the scheduler runs it in a thread
+    blocking = True
+
+    def __init__(self, path, limits_per_minute):
+        self.path = path
+        self.limits = {name: limit for name, limit in limits_per_minute.items() if limit > 0}
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def reserve(self, amounts):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            levels = {}
+            wait = 0.0
+            amounts = {name: amount for name, amount in amounts.items() if name in self.limits}
+            for name, amount in amounts.items():
+                limit = self.limits[name]
+                row = conn.execute("SELECT level, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+                level, updated = row if row else (limit, now)
+                level = min(limit, level + max(0.0, now - updated) * limit / 60.0)
+                levels[name] = level
+                amount = min(amount, limit)
+                if level < amount:
+                    wait = max(wait, (amount - level) * 60.0 / limit)
+            if wait <= 0:
+                for name, amount in amounts.items():
+                    conn.execute(
+                        "INSERT OR REPLACE INTO buckets (name, level, updated) VALUES (?, ?, ?)",
+                        (name, levels[name] - min(amount, self.limits[name]), now),
+                    )
+            conn.execute("COMMIT")
+            return wait
+        except sqlite3.Error as e:
+            log_event("rate_limiter_unavailable", action="not limiting this call", error=str(e))
+            return 0.0
+        finally:
+            conn.close()
+
+class FairScheduler:
+    """Admits Gemini calls under the request and token budgets, round-robin across users.
+
+    Each user has a FIFO queue; whenever budget frees up, the user at the
+    front of the rotation gets the next slot and moves to the back, so one
+    session submitting many calls cannot starve the others. Must be used
+    from a single event loop (the app's shared loop, or the CLI's).
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._queues = OrderedDict()  # user_id -> deque of waiters, in rotation order
+        self._changed = None
+
+    def position(self, user_id, waiter):
+        """Number of queued calls that will be admitted before this one."""
+        queue = self._queues[user_id]
+        index = queue.index(waiter)
+        ahead = index
+        before_user = True
+        for other_id, other_queue in self._queues.items():
+            if other_id == user_id:
+                before_user = False
+                continue
+            ahead += min(len(other_queue), index + 1 if before_user else index)
+        return ahead
+
+    async def acquire(self, user_id, tokens, on_position=None):
+        """Waits for this user's turn and budget for one request of ``tokens`` tokens.
+
+        ``on_position`` is called with the queue position whenever it changes
+        while waiting (0 means next in line, waiting only for budget).
+        """
+        amounts = {"requests": 1, "tokens": tokens}
+        waiter = object()  # Compared by identity, so equal requests stay distinct in the queue
+        self._queues.setdefault(user_id, deque()).append(waiter)
+        last_position = None
+        granted = False
+        try:
+            while True:
+                position = self.position(user_id, waiter)
+                timeout = None
+                if position == 0:
+                    wait = await self._reserve(amounts)
+                    if wait <= 0:
+                        granted = True
+                        return
+                    timeout = min(wait, _MAX_POLL_SECONDS)
+                if on_position is not None and position != last_position:
+                    on_position(position)
+                    last_position = position
+                await self._wait_for_change(timeout)
+        finally:
+            queue = self._queues[user_id]
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[user_id]
+            elif granted:
+                self._queues.move_to_end(user_id)
+            self._notify()
+
+    async def try_acquire(self, tokens):
+        """Takes budget for an optional extra call (e.g. a hedge) only if nobody is queued."""
+        if self._queues:
+            return False
+        return await self._reserve({"requests": 1, "tokens": tokens}) <= 0
+
+    async def _reserve(self, amounts):
+        # Shared buckets block on SQLite, which must not stall every session on the loop
+        if self.buckets.blocking:
+            return await asyncio.to_thread(self.buckets.reserve, amounts)
+        return self.buckets.reserve(amounts)
+
+    def _notify(self):
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    async def _wait_for_change(self, timeout):
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except TimeoutError:
+            pass
+
+def make_buckets(requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE, path=RATE_LIMIT_DB):
+    limits = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+    return SqliteBuckets(path, limits) if path else LocalBuckets(limits)
+
+def configure(requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE, path=RATE_LIMIT_DB):
+    """Replaces the shared scheduler's budgets, e.g. from command-line options."""
+    scheduler.buckets = make_buckets(requests_per_minute, tokens_per_minute, path)
+
+scheduler = FairScheduler(make_buckets())
@@ -0,0 +1,105 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from telemetry import log_event
+
+# Point every replica at the same file (e.g. on a shared volume) to share results
+STORE_PATH = os.environ.get(
+    "BRIEFLY_RESULT_STORE", os.path.join(tempfile.gettempdir(), "briefly_results.sqlite3")
+)
+TTL_SECONDS = int(os.environ.get("BRIEFLY_RESULT_TTL", 7 * 24 * 3600))
+MAX_BYTES = int(os.environ.get("BRIEFLY_RESULT_MAX_BYTES", 256 * 1024 * 1024))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+class ResultStore:
+    """Durable key/value store for parsed Gemini results, shared across processes.
+
+    Values are JSON-serialized and zlib-compressed. Entries expire after
+    ``ttl_seconds`` and the least recently used ones are evicted once the
+    stored payloads exceed ``max_bytes``. Any SQLite error is reported and
+    treated as a miss so the store can never break an analysis.
+    """
+
+    def __init__(self, path=STORE_PATH, ttl_seconds=TTL_SECONDS, max_bytes=MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT value, created_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                value, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    conn.commit()
+                    return None
+                conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            finally:
+                conn.close()
+            return json.loads(zlib.decompress(value))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            log_event("result_store_read_failed", path=self.path, error=str(e))
+            return None
+
+    def put(self, key, value):
+        now = time.time()
+        payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload), now, now),
+                )
+                self._evict(conn, now)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            log_event("result_store_write_failed", path=self.path, error=str(e))
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute(
+            "SELECT key, size FROM results ORDER BY accessed_at"
+        ).fetchall():
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+result_store = ResultStore()
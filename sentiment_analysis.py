@@ -1,9 +1,84 @@
-from textblob import TextBlob
+import hashlib
+import re
+
+from analysis_cache import LRUCache
+from long_document import split_sections
+from telemetry import span, watch_cache
+
+# TextBlob's PatternAnalyzer scores text with this module-level lexicon, which is
+# loaded once per process on first use; calling it directly skips building a
+# TextBlob per call. Results are cached by text hash across reruns.
+sentiment_cache = LRUCache(max_entries=128)
+watch_cache("sentiment", sentiment_cache)
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+def _section_title(section):
+    title = section.strip().split("\n", 1)[0].strip()
+    return title if len(title) <= 60 else title[:57] + "..."
+
+def _score_text(text):
+    """Scores every sentence in one pass, returning document totals and per-section results."""
+    from textblob.en import sentiment as pattern_sentiment
+
+    total_polarity = total_subjectivity = total_count = 0.0
+    sections = []
+    for section in split_sections(text):
+        polarity = subjectivity = count = 0.0
+        most_negative, most_negative_score = None, 0.0
+        sentences = [sentence for sentence in _SENTENCE_RE.split(section) if sentence.strip()]
+        for sentence in sentences:
+            score = pattern_sentiment(sentence)
+            assessed = len(score.assessments)
+            if not assessed:
+                continue
+            sentence_polarity, sentence_subjectivity = score
+            # Weight by assessed words so totals match scoring the whole text at once
+            polarity += sentence_polarity * assessed
+            subjectivity += sentence_subjectivity * assessed
+            count += assessed
+            if sentence_polarity < most_negative_score:
+                most_negative, most_negative_score = sentence.strip(), sentence_polarity
+
+        sections.append({
+            "section": _section_title(section),
+            "polarity": polarity / count if count else 0.0,
+            "subjectivity": subjectivity / count if count else 0.0,
+            "sentences": len(sentences),
+            "most_negative_sentence": most_negative,
+        })
+        total_polarity += polarity
+        total_subjectivity += subjectivity
+        total_count += count
+
+    overall = (
+        total_polarity / total_count if total_count else 0.0,
+        total_subjectivity / total_count if total_count else 0.0,
+    )
+    return overall, sections
+
+def _cached_score(text):
+    with span("sentiment"):
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        result = sentiment_cache.get(key)
+        if result is None:
+            result = _score_text(text)
+            sentiment_cache.put(key, result)
+        return result
 
 def analyze_sentiment(text):
-    blob = TextBlob(text)
-    sentiment = blob.sentiment
-    return sentiment.polarity, sentiment.subjectivity
+    return _cached_score(text)[0]
+
+def analyze_section_sentiment(text):
+    """Returns polarity/subjectivity per section of the brief, in document order."""
+    return _cached_score(text)[1]
+
+def interpret_sections(sections):
+    """Maps interpret_sentiment over per-section results."""
+    return [
+        (section["section"],) + interpret_sentiment(section["polarity"], section["subjectivity"])
+        for section in sections
+    ]
 
 def interpret_sentiment(polarity, subjectivity):
     if polarity <= -0.5:
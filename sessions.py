@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# Sessions inactive for longer than this release their references
+SESSION_IDLE_SECONDS = float(os.environ.get("BRIEFLY_SESSION_IDLE_SECONDS", 1800))
+# Ceiling on cached documents and analyses held on behalf of sessions in this process
+SESSION_MEMORY_BYTES = int(float(os.environ.get("BRIEFLY_SESSION_MEMORY_MB", 256)) * 1024 * 1024)
+
+def approximate_size(obj, _seen=None):
+    """Rough deep size in bytes of strings, containers and slotted objects."""
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approximate_size(k, _seen) + approximate_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item, _seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(approximate_size(getattr(obj, name), _seen) for name in obj.__slots__ if hasattr(obj, name))
+    return size
+
+@dataclass(slots=True)
+class SessionEntry:
+    last_seen: float
+    refs: tuple  # (cache, key, nbytes) for each shared cache entry the session uses
+
+class SessionRegistry:
+    """Tracks which shared cache entries each session uses, and releases them when it goes idle.
+
+    Session state itself only keeps cache keys. Entries referenced by no
+    remaining session are dropped from their cache when sessions idle out,
+    or when the bytes referenced by all sessions exceed ``max_bytes`` (least
+    recently active sessions go first). A released session that comes back
+    simply misses the cache and recomputes.
+    """
+
+    def __init__(self, idle_seconds=SESSION_IDLE_SECONDS, max_bytes=SESSION_MEMORY_BYTES):
+        self.idle_seconds = idle_seconds
+        self.max_bytes = max_bytes
+        self._sessions = OrderedDict()  # session_id -> SessionEntry, least recently active first
+        self._lock = threading.Lock()
+
+    def touch(self, session_id, refs=None):
+        """Marks a session active, replacing its references when ``refs`` is given."""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if refs is not None or entry is None:
+                entry = SessionEntry(time.monotonic(), tuple(refs or ()))
+            entry.last_seen = time.monotonic()
+            self._sessions[session_id] = entry
+            released = self._evict()
+        self._release(released)
+
+    def _evict(self):
+        """Drops idle sessions, then the least recently active ones while over the ceiling."""
+        evicted = []
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if entry.last_seen >= cutoff:
+                break
+            evicted.append(self._sessions.pop(session_id))
+
+        while len(self._sessions) > 1 and self._referenced_bytes() > self.max_bytes:
+            evicted.append(self._sessions.popitem(last=False)[1])
+
+        still_used = {(id(cache), key) for entry in self._sessions.values() for cache, key, _ in entry.refs}
+        return [(cache, key) for entry in evicted for cache, key, _ in entry.refs if (id(cache), key) not in still_used]
+
+    def _referenced_bytes(self):
+        # Entries shared by several sessions (the same brief uploaded twice) count once
+        unique = {(id(cache), key): nbytes for entry in self._sessions.values() for cache, key, nbytes in entry.refs}
+        return sum(unique.values())
+
+    def _release(self, released):
+        for cache, key in released:
+            cache.discard(key)
+
+    def stats(self):
+        """Session count and the bytes of cached data they reference."""
+        with self._lock:
+            released = self._evict()
+            stats = {
+                "sessions": len(self._sessions),
+                "bytes": self._referenced_bytes(),
+                "max_bytes": self.max_bytes,
+            }
+        self._release(released)
+        return stats
+
+# Shared by every session in the process
+session_registry = SessionRegistry()
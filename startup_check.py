@@ -0,0 +1,68 @@
+"""Cold-start regression check for the app's own modules.
+
+Usage:
+    python startup_check.py [--budget-ms 300]
+
+Imports everything streamlit_app.py imports at the top level in a fresh
+interpreter (after Streamlit itself, which every replica pays for anyway)
+and fails if that takes longer than the budget or pulls in a heavy
+dependency that should only load once the first upload needs it.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APP_MODULES = [
+    "ui_config", "event_loop", "text_extraction", "sentiment_analysis",
+    "ai_analysis", "utils", "batch_analysis", "sessions", "static_content", "telemetry",
+]
+# Dependencies that must stay out of the first page render
+LAZY_MODULES = ["google.generativeai", "pandas", "PyPDF2", "docx", "textblob", "json_repair"]
+STARTUP_BUDGET_MS = float(os.environ.get("BRIEFLY_STARTUP_BUDGET_MS", 300))
+
+_MEASURE = """
+import json, sys, time
+import streamlit
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{"elapsed_ms": elapsed_ms, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+def measure_startup(runs=3):
+    """Returns the fastest import time (ms) over ``runs`` fresh interpreters and any eagerly loaded heavy modules."""
+    code = _MEASURE.format(modules=APP_MODULES, lazy=LAZY_MODULES)
+    best, loaded = None, []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        best = result["elapsed_ms"] if best is None else min(best, result["elapsed_ms"])
+        loaded = result["loaded"]
+    return best, loaded
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check app import time against a budget.")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS, help="Maximum import time in milliseconds")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to time; the fastest run is used")
+    args = parser.parse_args(argv)
+
+    elapsed_ms, loaded = measure_startup(args.runs)
+    print(f"App modules imported in {elapsed_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if loaded:
+        print(f"Heavy dependencies loaded at import time: {', '.join(loaded)}")
+        failed = True
+    if elapsed_ms > args.budget_ms:
+        print("Startup time is over budget")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
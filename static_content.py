@@ -0,0 +1,151 @@
+import streamlit as st
+
+# Copy for the static marketing sections below the analyzer
+
+BENEFITS_INTRO = """
+    <p class="section-description">
+        Briefly combines the expertise of seasoned marketing professionals with the power of AI to help you craft marketing briefs that drive success. Our platform provides you with the tools and insights needed to ensure your campaigns are effective, targeted, and impactful.
+    </p>
+    """
+
+BENEFIT_CARDS = [
+    """
+        <div class="benefit-card">
+            <div class="benefit-container">
+                <span class="benefit-icon">🧠</span> 
+                <h3 class="benefit-title">Get Expert Advice</h3>
+            </div>
+            <p class="benefit-description">Benefit from the collective wisdom of seasoned marketing professionals. Briefly's AI analyzes your brief and provides tailored recommendations based on industry best practices, ensuring your strategy is set up for success.</p>
+        </div>
+        """,
+    """
+        <div class="benefit-card">
+            <div class="benefit-container">
+                <span class="benefit-icon">💪</span> 
+                <h3 class="benefit-title">Craft Briefs with Confidence</h3>
+            </div>
+            <p class="benefit-description">Eliminate the guesswork and uncertainty from brief creation. Briefly's intuitive platform guides you through each step, providing clear suggestions and actionable insights so you can build winning briefs every time.</p>
+        </div>
+        """,
+    """
+        <div class="benefit-card">
+            <div class="benefit-container">
+                <span class="benefit-icon">🚀</span> 
+                <h3 class="benefit-title">Create Business Impact</h3>
+            </div>
+            <p class="benefit-description">Don't just launch campaigns—drive measurable results. Briefly helps you define clear objectives, track key metrics, and optimize your strategies to maximize your marketing ROI and achieve your business goals.</p>
+        </div>
+        """,
+]
+
+SCORING_INTRO = "Our expert analysis powered by AI evaluates your marketing brief across key areas to pinpoint strengths and highlight opportunities for improvement.  Click on each category below to learn more:"
+
+CATEGORIES = {
+    "🎯 Clarity of Objectives": {
+        "What We Look For": "Clearly defined, measurable, and achievable marketing objectives that align with your overall business goals.",
+        "Why It Matters": "Clear objectives ensure everyone understands the goals and can work towards them effectively.",
+        "Tips to Improve": " - Use the SMART framework (Specific, Measurable, Achievable, Relevant, Time-bound).<br> - Clearly link objectives to business outcomes.<br> - Ensure alignment across your marketing team."
+    },
+    "🤝 Strategic Alignment": {
+        "What We Look For": "Clear links between your marketing campaign and your overall business objectives and strategies.",
+        "Why It Matters": "Ensures your marketing efforts directly contribute to achieving your company's wider goals.",
+        "Tips to Improve": " - Explicitly state how the campaign supports key business goals.<br> - Align marketing metrics with business KPIs.<br> - Communicate the campaign's strategic importance to stakeholders."
+    },
+    "👥 Target Audience Definition": {
+        "What We Look For": "A well-defined target audience with specific demographics, psychographics, behaviors, and needs.",
+        "Why It Matters": "Understanding your audience is crucial for crafting targeted messaging and choosing the right channels.",
+        "Tips to Improve": " - Create detailed buyer personas.<br> - Conduct market research to understand your audience's needs and pain points.<br> - Use data to segment your audience for more targeted campaigns."
+    },
+    "⚔️ Competitive Analysis": {
+        "What We Look For": "Thorough research on your competitors, highlighting their strengths, weaknesses, and your brand's unique value proposition.",
+        "Why It Matters": "A strong competitive analysis helps you differentiate your offering and develop more effective strategies.",
+        "Tips to Improve": " - Identify your top competitors.<br> - Analyze their marketing strategies, target audience, and messaging.<br> - Clearly articulate your competitive advantages."
+    },
+    "🗺️ Channel Strategy": {
+        "What We Look For": "A strategic approach to channel selection, ensuring you reach your target audience in the most effective way.",
+        "Why It Matters": "The right channels amplify your message and maximize your campaign's reach.",
+        "Tips to Improve": " - Consider your target audience's preferred channels.<br> - Research the strengths and limitations of different channels.<br> - Use a mix of online and offline channels for a holistic approach."
+    },
+    "🔑 Key Performance Indicators (KPIs)": {
+        "What We Look For": "Specific, measurable, and relevant KPIs that align with your objectives and allow you to track campaign performance.",
+        "Why It Matters": "KPIs provide insights into what's working and what's not, enabling data-driven optimization.",
+        "Tips to Improve": " - Choose KPIs that directly relate to your objectives.<br> - Set realistic and measurable targets for each KPI.<br> - Regularly track and analyze your KPIs to make data-driven adjustments."
+    },
+}
+
+TAB_STYLE = """
+    <style>
+        /* Style for tab titles */
+        button[data-baseweb="tab"] { 
+            font-size: 18px !important; /* Adjust font size as needed */
+        }
+    </style>
+    """
+
+FAQ_ITEMS = [
+    {
+        "question": "How does Briefly analyze my marketing brief?",
+        "answer": """
+        Briefly uses advanced natural language processing (NLP) techniques and machine learning models to analyze your marketing brief. 
+        It evaluates various aspects such as clarity of objectives, strategic alignment, target audience definition, competitive analysis, channel strategy, and key performance indicators (KPIs).
+        """
+    },
+    {
+        "question": "What metrics are used in the analysis?",
+        "answer": """
+        The analysis includes several metrics:
+        
+        | Criterion                  | Description                                                                                      | Importance                                                                                           | Tips for Improvement                                                                                                                                           |
+        |----------------------------|--------------------------------------------------------------------------------------------------|------------------------------------------------------------------------------------------------------|-----------------------------------------------------------------------------------------------------------------------------------------------------------------|
+        | Clarity of Objectives      | Evaluates how clear and specific the objectives of the marketing brief are.                      | Clear objectives help ensure everyone understands the goals and can work towards them effectively.   | Define specific, measurable, achievable, relevant, and time-bound (SMART) objectives.                                     |
+        | Strategic Alignment        | Checks if the brief aligns with overall business goals and strategies.                           | Ensures the marketing efforts support the broader business objectives.                               | Clearly articulate how the campaign supports the company's overall marketing and business objectives.                      |
+        | Target Audience Definition | Assesses how well-defined and relevant the target audience is.                                   | A well-defined target audience helps tailor the marketing strategy to reach the right people.        | Specify demographics, psychographics, behaviors, and needs of the target audience.                                         |
+        | Competitive Analysis       | Identifies competitors and competitive advantages mentioned in the brief.                        | Understanding competitors helps differentiate your offering and develop effective strategies.        | Research and identify key competitors, analyze their strengths and weaknesses, and highlight your unique value proposition. |
+        | Channel Strategy           | Recommends effective channels for the campaign based on the brief.                               | Choosing the right channels ensures the message reaches the target audience effectively.             | Develop a comprehensive channel strategy and justify the selection of each channel based on its relevance to the audience.  |
+        | Key Performance Indicators (KPIs) | Suggests key performance indicators to track the success of the campaign.                          | KPIs help measure the effectiveness of the campaign and guide data-driven adjustments.               | Define specific and measurable KPIs related to your objectives, such as website traffic, lead generation, and sales conversions. |
+        """
+    },
+    {
+        "question": "Can I see examples of improvements?",
+        "answer": """
+        Yes, here are some examples:
+        - **Target Audience Definition:** From "No target demographics specified" to "Included target demographics such as age 25-34, gender: female, location: New York, interests: fitness, wellness."
+        - **Competitive Analysis:** From "No competitors mentioned" to "Added relevant competitors such as Competitor A, Competitor B, Competitor C."
+        - **Key Performance Indicators (KPIs):** From "No KPIs defined" to "Included KPIs such as conversion rate, click-through rate, customer acquisition cost."
+        """
+    },
+    {
+        "question": "How are the scores calculated?",
+        "answer": """
+        Scores are calculated based on a combination of factors including clarity, relevance, completeness, and alignment with best practices. 
+        Each aspect of the brief is evaluated and given a score out of 100, which contributes to the overall score.
+        """
+    },
+    {
+        "question": "What should I do if my brief has a low score?",
+        "answer": """
+        If your brief has a low score, review the detailed feedback and suggestions provided. Focus on improving areas with the lowest scores first. 
+        Use the actionable insights to refine your objectives, better define your target audience, align your strategy with business goals, and specify clear KPIs.
+        """
+    }
+]
+
+@st.cache_resource(show_spinner=False)
+def static_bundle():
+    """Markdown for every static section, formatted once per process and shared by all sessions."""
+    return {
+        "benefits_intro": BENEFITS_INTRO,
+        "benefit_cards": BENEFIT_CARDS,
+        "scoring_intro": SCORING_INTRO,
+        "tab_style": TAB_STYLE,
+        "category_tabs": [
+            (
+                category,
+                f"**What We Look For:** {details['What We Look For']}\n\n"
+                f"**Why It Matters:** {details['Why It Matters']}\n\n"
+                f"**Tips to Improve:** {details['Tips to Improve']}",
+            )
+            for category, details in CATEGORIES.items()
+        ],
+        "faq": [(item["question"], item["answer"]) for item in FAQ_ITEMS],
+    }
@@ -0,0 +1,120 @@
+import json
+
+class IncrementalAnalysisParser:
+    """Incremental scanner over a streamed analysis response.
+
+    Feed it chunks of the Gemini output as they arrive; ``feed`` returns the
+    events completed by that chunk:
+
+    - ``('overall_score', score)`` once the top-level score value ends
+    - ``('category', name, details)`` once a ``breakdown`` entry's object closes
+
+    Only structure is tracked here. The full response is still parsed
+    afterwards, so a malformed stream just produces fewer early events.
+    """
+
+    def __init__(self):
+        self._stack = []  # One [kind, key, expecting_key] frame per open container
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._key_chars = None
+        self._capture = None  # Characters of the value currently being captured
+        self._capture_depth = None
+        self._capture_key = None
+
+    def feed(self, chunk):
+        events = []
+        for char in chunk:
+            if not self._started:
+                # Skip code fences or any other preamble before the JSON
+                if char != '{':
+                    continue
+                self._started = True
+
+            if self._capture is not None:
+                self._capture.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._key_chars is not None:
+                        self._stack[-1][1] = ''.join(self._key_chars)
+                        self._key_chars = None
+                    continue
+                if self._key_chars is not None:
+                    self._key_chars.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._stack and self._stack[-1][0] == '{' and self._stack[-1][2]:
+                    self._key_chars = []
+            elif char in '{[':
+                if char == '{' and self._at_category():
+                    self._start_capture(char, 'category')
+                self._stack.append([char, None, char == '{'])
+            elif char in '}]':
+                if self._capture_key == 'overall_score' and len(self._stack) == 1:
+                    self._finish_score(events)
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if self._capture is not None and len(self._stack) == self._capture_depth:
+                    self._finish_category(events)
+            elif char == ':':
+                if self._stack and self._stack[-1][0] == '{':
+                    self._stack[-1][2] = False
+                    if len(self._stack) == 1 and self._stack[-1][1] == 'overall_score':
+                        self._start_capture('', 'overall_score')
+            elif char == ',':
+                if self._capture_key == 'overall_score' and len(self._stack) == 1:
+                    self._finish_score(events)
+                if self._stack and self._stack[-1][0] == '{':
+                    self._stack[-1][2] = True
+        return events
+
+    def _at_category(self):
+        return (
+            len(self._stack) == 2
+            and self._stack[0][1] == 'breakdown'
+            and self._stack[1][0] == '{'
+            and self._stack[1][1] is not None
+        )
+
+    def _start_capture(self, first_char, capture_key):
+        self._capture = [first_char] if first_char else []
+        self._capture_depth = len(self._stack)
+        self._capture_key = capture_key
+
+    def _end_capture(self):
+        text = ''.join(self._capture)
+        self._capture = None
+        self._capture_depth = None
+        self._capture_key = None
+        return text
+
+    def _finish_score(self, events):
+        text = self._end_capture()[:-1].strip()  # Drop the ',' or '}' that ended it
+        try:
+            events.append(('overall_score', int(float(json.loads(text)))))
+        except (ValueError, TypeError):
+            pass
+
+    def _finish_category(self, events):
+        category = self._stack[-1][1]
+        text = self._end_capture()
+        try:
+            details = json.loads(text)
+        except json.JSONDecodeError:
+            from json_repair import repair_json
+            try:
+                details = json.loads(repair_json(text))
+            except Exception:
+                return
+        if isinstance(details, dict):
+            events.append(('category', category, details))
@@ -1,20 +1,324 @@
 import streamlit as st
-import pandas as pd
-import docx
 import io
-import asyncio
+import os
+import uuid
 import ui_config
+import event_loop
 
-from text_extraction import extract_text_from_docx, extract_text_from_pdf
-from sentiment_analysis import analyze_sentiment, interpret_sentiment
-from ai_analysis import analyze_text_async, rewrite_brief
+from text_extraction import extract_document, extraction_cache
+from sentiment_analysis import analyze_sentiment, analyze_section_sentiment, interpret_sentiment, interpret_sections
+from ai_analysis import analyze_text_stream, rewrite_brief_stream
+from analysis_cache import analysis_cache
+from sessions import approximate_size, session_registry
 from utils import parse_and_improve
+from batch_analysis import extract_texts, analyze_batch, summarize_batch
 from ui_config import add_footer
+from static_content import static_bundle
+from telemetry import span, start_metrics_server
 
 # --- UI Configuration ---
 ui_config.set_page_config()
 ui_config.apply_custom_styles()
 
+# Serves /metrics on BRIEFLY_METRICS_PORT once per process (no-op when unset)
+start_metrics_server()
+
+# Identifies this browser session to the rate limiter, which queues Gemini calls fairly per user
+if 'user_id' not in st.session_state:
+    st.session_state['user_id'] = uuid.uuid4().hex
+session_registry.touch(st.session_state['user_id'])
+
+# --- Admin View ---
+# Shown only with ?admin=<BRIEFLY_ADMIN_TOKEN> in the URL
+admin_token = os.environ.get("BRIEFLY_ADMIN_TOKEN")
+if admin_token and st.query_params.get("admin") == admin_token:
+    with st.sidebar:
+        st.subheader("Server memory")
+        session_stats = session_registry.stats()
+        st.metric("Active sessions", session_stats['sessions'])
+        st.metric("Session data", f"{session_stats['bytes'] / 1e6:.1f} MB of {session_stats['max_bytes'] / 1e6:.0f} MB")
+        st.caption(
+            f"Cached documents: {len(extraction_cache)} · cached analyses: {len(analysis_cache)} "
+            f"({analysis_cache.hits} hits, {analysis_cache.misses} misses)"
+        )
+
+def show_queue_position(placeholder, position):
+    if position == 0:
+        placeholder.info("Briefly is busy right now. You're next in line, starting shortly...")
+    else:
+        placeholder.info(f"Briefly is busy right now. You're number {position + 1} in the queue...")
+
+def lookup_brief(document_key, analysis_key):
+    """The extracted text and analysis behind a session's cache keys, or ``(None, None)`` once released."""
+    entry = extraction_cache.get(document_key)
+    analysis = analysis_cache.get(analysis_key)
+    if entry is None or analysis is None:
+        return None, None
+    return entry["text"], analysis
+
+def show_released(section):
+    st.info("These results were released from memory while the page was idle.")
+    if st.button("Reload results", key=f"reload_{section}"):
+        st.rerun()
+
+@st.fragment
+@span("render", section="results")
+def render_results(document_key, analysis_key):
+    """Score, breakdown, sentiment, gaps and insights for an analyzed brief.
+
+    Takes cache keys rather than the text and analysis, which Streamlit would
+    otherwise keep in this session's fragment storage for every rerun.
+    """
+    document_text, analysis = lookup_brief(document_key, analysis_key)
+    if analysis is None:
+        show_released("results")
+        return
+    overall_score = analysis.overall_score
+    st.markdown("---")  # Add a visual separator
+
+    # Overall Score and Feedback
+    st.header("Overall Score")
+    col1, col2 = st.columns([1, 4])  # Adjust column ratios as needed
+    col1.metric("", f"{overall_score}/100")
+
+    with col2:
+        if overall_score >= 90:
+            st.success("Excellent! Your marketing brief is very strong.")
+        elif overall_score >= 70:
+            st.success("Great job! Your brief is well-structured and informative.")
+        elif overall_score >= 50:
+            st.warning("Your brief shows potential, but there's room for improvement.")
+        else:
+            st.error("Your brief needs significant work to be effective.")
+
+    # Detailed Breakdown (Exclude Extracted Data Columns, Adjust Column Widths)
+    st.markdown("---")
+    st.header("Detailed Analysis & Feedback")
+    relevant_columns = ['Score', 'Feedback']  # Only include relevant columns
+    df_display = analysis.to_dataframe(relevant_columns).style.format({"Score": "{:.0f}"}).set_properties(**{'text-align': 'left'})
+
+    # Adjust column widths (example)
+    df_display.set_table_styles([
+        {'selector': 'th.col_heading', 'props': [('text-align', 'left')]},
+        {'selector': 'th.col_heading.level0', 'props': [('max-width', '150px')]}, # Adjust width as needed
+        {'selector': 'td', 'props': [('word-wrap', 'break-word')]} # Wrap text to new lines
+    ])
+
+    st.dataframe(df_display, use_container_width=True)
+
+    # --- Competitors and Target Location/Market Section ---
+    st.markdown("---")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown('<h3 class="competitors-title">🏢 Competitors</h3>', unsafe_allow_html=True)
+
+        if analysis.competitors_mentioned:
+            st.markdown("The following competitors were mentioned in your brief:")
+            for competitor in analysis.competitors_mentioned:
+                st.markdown(f"- {competitor}")
+        else:
+            st.markdown('<p class="error-text">No competitors were mentioned in your brief.</p>', unsafe_allow_html=True)
+            st.markdown("Identifying competitors helps you understand the market landscape and differentiate your offering.")
+
+    with col2:
+        st.markdown('<h3 class="competitors-title">🌍 Target Location/Market</h3>', unsafe_allow_html=True)
+
+        target_audience = analysis.categories.get('Target Audience Definition')
+        target_locations = target_audience.target_locations if target_audience else ()
+
+        if target_locations:
+            st.markdown("The following target locations/markets were mentioned in your brief:")
+            for location in target_locations:
+                st.markdown(f"- {location}")
+        else:
+            st.markdown('<p class="error-text">No target locations/markets were mentioned in your brief.</p>', unsafe_allow_html=True)
+            st.markdown("Specifying target locations/markets helps tailor your strategy to specific regions and audiences.")
+
+    # --- Sentiment and Gap Analysis Section ---
+    st.markdown("---")
+    col1, col2 = st.columns([1, 1], gap="large")  # Add gap between columns
+
+    with col1:
+        st.markdown('<h3 class="sentiment-title">😊 Sentiment Analysis</h3>', unsafe_allow_html=True)
+        polarity_text, subjectivity_text = interpret_sentiment(*analyze_sentiment(document_text))
+        st.write(polarity_text)
+        st.write(subjectivity_text)
+
+        # Point out which part of the brief drives a negative tone
+        section_sentiment = analyze_section_sentiment(document_text)
+        if len(section_sentiment) > 1:
+            import pandas as pd
+            with st.expander("Sentiment by section"):
+                st.dataframe(
+                    pd.DataFrame(section_sentiment)[['section', 'polarity', 'subjectivity']],
+                    use_container_width=True,
+                    hide_index=True,
+                )
+                most_negative = min(section_sentiment, key=lambda section: section['polarity'])
+                if most_negative['polarity'] < -0.1:
+                    title, section_polarity_text, _ = interpret_sections([most_negative])[0]
+                    st.warning(f"**{title}:** {section_polarity_text}")
+                    if most_negative['most_negative_sentence']:
+                        st.markdown(f"> {most_negative['most_negative_sentence']}")
+
+    with col2:
+        st.markdown('<h3 class="gap-analysis-title">🔍 Gap Analysis</h3>', unsafe_allow_html=True)
+
+        if analysis.gap_analysis:
+            st.markdown("The following elements appear to be missing from your brief:")
+            for item in analysis.gap_analysis:
+                st.markdown(f'<li class="gap-analysis-item">{item}</li>', unsafe_allow_html=True)
+        else:
+            st.success("✅ No missing elements detected! Your brief looks comprehensive.")
+
+    # Areas for Improvement (using accordions)
+    st.markdown("---")
+    st.header("Actionable Insights")
+    improvement_areas = parse_and_improve(analysis)
+
+    for category, details in improvement_areas.items():
+        category_result = analysis.categories[category]
+        score = category_result.score
+        with st.expander(f"**{category} ({score}/100)**"):  # Include score in title
+            st.markdown("""
+            <style>
+                .suggestion-text {
+                    font-size: 16px; 
+                }
+            </style>
+            """, unsafe_allow_html=True)
+
+            # Display short description (taken from the 'Feedback' column)
+            st.markdown(f"<p class='suggestion-text'>{category_result.feedback}</p>", unsafe_allow_html=True)
+
+            # Display suggestions
+            st.markdown("<p class='suggestion-text'><strong>Suggestions:</strong></p>", unsafe_allow_html=True)
+            for suggestion in details["Suggestions"]:
+                st.write(f"- {suggestion}")
+
+            # Access and display extracted data 
+            for label, values in category_result.extracted():
+                st.write(f"**{label.title()}: {', '.join(values)}")
+
+@st.fragment
+@span("render", section="improved_brief")
+def render_improved_brief(document_key, analysis_key):
+    """The rewrite section; its button reruns only this fragment, not the extraction and analysis above."""
+    document_text, analysis = lookup_brief(document_key, analysis_key)
+    if analysis is None:
+        show_released("improved_brief")
+        return
+
+    # --- Improved Brief Section ---
+    st.markdown("---")
+    st.header("✨ Improved Brief (Premium Feature)")
+    st.markdown("This section provides an improved version of your brief based on our analysis. Upgrade to access full features!")
+
+    if st.button("Generate Improved Brief"):
+        st.session_state['improved_brief_key'] = analysis_key
+        st.session_state['rewrite_key'] = None
+
+    # Keep the rewrite on screen across later reruns (e.g. the download click); repeats are served from the store
+    if st.session_state.get('improved_brief_key') == analysis_key:
+        queue_placeholder = st.empty()
+        # A click reruns only this fragment, outside the app's own error handling
+        try:
+            improved_brief_stream, suggestions, from_to_quotes = rewrite_brief_stream(
+                document_text, analysis,
+                user_id=st.session_state['user_id'],
+                on_queue=lambda position: show_queue_position(queue_placeholder, position),
+                on_stored=lambda key: st.session_state.__setitem__('rewrite_key', key),
+                stored_key=st.session_state.get('rewrite_key'),
+            )
+
+            # Display original and improved briefs side by side
+            col1, col2 = st.columns(2)
+
+            with col1:
+                st.markdown('<h3 class="sentiment-title">Original Brief</h3>', unsafe_allow_html=True)
+                st.text_area("Original Brief", value=document_text, height=300)
+
+            with col2:
+                st.markdown('<h3 class="sentiment-title">Improved Brief</h3>', unsafe_allow_html=True)
+                # Render the rewrite live as Gemini streams it
+                with st.container(height=300):
+                    improved_brief = st.write_stream(improved_brief_stream)
+            queue_placeholder.empty()
+
+            st.success("Your improved brief is ready!")
+
+            # --- Download Button (Word DOCX) ---
+            import docx
+            doc = docx.Document()
+            doc.add_paragraph(improved_brief)
+            doc_bytes = io.BytesIO()
+            doc.save(doc_bytes)
+            doc_bytes.seek(0)
+
+            st.download_button(
+                label="Download Improved Brief (DOCX)",
+                data=doc_bytes,
+                file_name="improved_brief.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            )
+
+            # --- Major Improvements Section ---
+            st.markdown("---")
+            st.header("📈 Major Improvements")
+            st.markdown("""
+                In this section, we highlight major improvements made to your marketing brief. These improvements are based on a detailed analysis and aim to enhance the effectiveness of your brief.
+                Below are some examples of changes made:
+                - **Target Audience Definition:** From "No target demographics specified" to "Included target demographics such as age 25-34, gender: female, location: New York, interests: fitness, wellness."
+                - **Competitive Analysis:** From "No competitors mentioned" to "Added relevant competitors such as Competitor A, Competitor B, Competitor C."
+                - **Key Performance Indicators (KPIs):** From "No KPIs defined" to "Included KPIs such as conversion rate, click-through rate, customer acquisition cost."
+            """)
+            if from_to_quotes:
+                for category, quotes in from_to_quotes.items():
+                    with st.expander(f"**{category}**"):
+                        st.markdown(f"**From:** {quotes['from']}")
+                        st.markdown(f"**To:** {quotes['to']}")
+            else:
+                st.markdown("No additional suggestions were generated.")
+        except Exception as e:
+            # Forget the request, so later reruns do not call Gemini again without a new click
+            st.session_state['improved_brief_key'] = None
+            queue_placeholder.empty()
+            st.error(f"An error occurred while generating the improved brief: {e}")
+
+@st.fragment
+@span("render", section="static")
+def render_static_sections():
+    """Benefits, scoring categories and FAQ, rendered from the pre-built static bundle."""
+    bundle = static_bundle()
+
+    # --- Benefits Section ---
+    st.markdown("---")
+    st.header("Why Choose Briefly?")
+    st.markdown(bundle["benefits_intro"], unsafe_allow_html=True)
+
+    st.markdown('<div class="benefit-card-container">', unsafe_allow_html=True)
+    for column, card in zip(st.columns(3), bundle["benefit_cards"]):
+        column.markdown(card, unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True) # Close the benefit-card-container
+
+    # --- Understanding Your Scores Section ---
+    st.markdown("---")
+    st.header("What We Focus On To Score Your Briefs")
+    st.markdown(bundle["scoring_intro"])
+    st.markdown(bundle["tab_style"], unsafe_allow_html=True)
+
+    category_tabs = bundle["category_tabs"]
+    for tab, (_, content) in zip(st.tabs([category for category, _ in category_tabs]), category_tabs):
+        tab.markdown(content, unsafe_allow_html=True)
+
+    # --- FAQ Section ---
+    st.markdown("---")
+    st.header("Frequently Asked Questions (FAQ)")
+    for question, answer in bundle["faq"]:
+        with st.expander(question):
+            st.markdown(answer)
+
 # --- Main App ---
 st.markdown(
     """
@@ -47,395 +351,132 @@ st.markdown(
 )
 
 # --- File Upload ---
-uploaded_file = st.file_uploader(
-    "Upload Your Marketing Brief (DOCX or PDF)", type=["docx", "pdf"], accept_multiple_files=False
-)
+batch_mode = st.toggle("Batch mode: analyze several briefs at once")
+
+if batch_mode:
+    uploaded_file = None
+    uploaded_files = st.file_uploader(
+        "Upload Your Marketing Briefs (DOCX or PDF)", type=["docx", "pdf"], accept_multiple_files=True
+    )
+else:
+    uploaded_files = []
+    uploaded_file = st.file_uploader(
+        "Upload Your Marketing Brief (DOCX or PDF)", type=["docx", "pdf"], accept_multiple_files=False
+    )
+
+# --- Process Batch Upload ---
+if uploaded_files:
+    try:
+        files = [(file.name, file) for file in uploaded_files]
+
+        with st.spinner("Extracting text from your briefs..."):
+            extracted = extract_texts(files)
+
+        documents = []
+        for file_name, text in extracted:
+            if text is None:
+                st.error(f"Failed to extract text from {file_name}.")
+            else:
+                documents.append((file_name, text))
+
+        st.markdown("---")
+        st.header("Batch Results")
+        progress = st.progress(0.0, text="Analyzing your briefs...")
+        batch_results = []
+
+        for file_name, analysis in event_loop.iterate(analyze_batch(documents, user_id=st.session_state['user_id'])):
+            batch_results.append((file_name, analysis))
+            progress.progress(
+                len(batch_results) / len(documents),
+                text=f"Analyzed {len(batch_results)} of {len(documents)} briefs",
+            )
+
+            # Show each brief as soon as its analysis finishes
+            if analysis is None:
+                st.error(f"Error analyzing {file_name}. Please try again.")
+                continue
+            with st.expander(f"**{file_name} ({analysis.overall_score}/100)**"):
+                st.dataframe(analysis.to_dataframe(['Score', 'Feedback']), use_container_width=True)
+                if analysis.gap_analysis:
+                    st.markdown("**Missing elements:**")
+                    for item in analysis.gap_analysis:
+                        st.markdown(f"- {item}")
+
+        # --- Batch Summary ---
+        st.markdown("---")
+        st.header("Batch Summary")
+        st.dataframe(summarize_batch(batch_results), use_container_width=True, hide_index=True)
+
+    except Exception as e:
+        st.error(f"An error occurred: {e}")
 
 # --- Process Uploaded File ---
 if uploaded_file is not None:
     try:
-        file_bytes = uploaded_file.read()
-
-        if uploaded_file.name.endswith(".docx"):
-            document_text = extract_text_from_docx(file_bytes)
-        elif uploaded_file.name.endswith(".pdf"):
-            document_text = extract_text_from_pdf(file_bytes)
-        else:
+        if not uploaded_file.name.endswith((".docx", ".pdf")):
             st.error("Unsupported file type. Please upload a DOCX or PDF file.")
             st.stop()  # Stop execution if the file type is invalid
 
+        # The upload is read in place and its text memoized, so reruns skip extraction
+        document_text, extraction_stats = extract_document(uploaded_file.name, uploaded_file)
+
         if document_text is None:
             st.error("Failed to extract text from the uploaded file. Please try again with a different file.")
             st.stop()
 
-        # --- Analyze the Text ---
-        with st.spinner("Analyzing your brief..."):
-            df_results, overall_score, gap_analysis_results, competitors_mentioned = asyncio.run(analyze_text_async(document_text))
-
-        # Store analysis results in session state
-        st.session_state['df_results'] = df_results
-        st.session_state['overall_score'] = overall_score
-        st.session_state['gap_analysis_results'] = gap_analysis_results
-        st.session_state['competitors_mentioned'] = competitors_mentioned
-        st.session_state['document_text'] = document_text
-
-        # --- Perform Sentiment Analysis ---
-        polarity, subjectivity = analyze_sentiment(document_text)
-        polarity_text, subjectivity_text = interpret_sentiment(polarity, subjectivity)
-
-        # Store sentiment analysis in session state
-        st.session_state['polarity_text'] = polarity_text
-        st.session_state['subjectivity_text'] = subjectivity_text
-
-        # --- Display Results ---
-        if df_results is not None:
-            st.markdown("---")  # Add a visual separator
-
-            # Overall Score and Feedback
-            st.header("Overall Score")
-            col1, col2 = st.columns([1, 4])  # Adjust column ratios as needed
-            col1.metric("", f"{overall_score}/100")
-
-            with col2:
-                if overall_score >= 90:
-                    st.success("Excellent! Your marketing brief is very strong.")
-                elif overall_score >= 70:
-                    st.success("Great job! Your brief is well-structured and informative.")
-                elif overall_score >= 50:
-                    st.warning("Your brief shows potential, but there's room for improvement.")
-                else:
-                    st.error("Your brief needs significant work to be effective.")
-
-            # Detailed Breakdown (Exclude Extracted Data Columns, Adjust Column Widths)
-            st.markdown("---")
-            st.header("Detailed Analysis & Feedback")
-            relevant_columns = ['Score', 'Feedback']  # Only include relevant columns
-            df_display = df_results[relevant_columns].style.format({"Score": "{:.0f}"}).set_properties(**{'text-align': 'left'})
-
-            # Adjust column widths (example)
-            df_display.set_table_styles([
-                {'selector': 'th.col_heading', 'props': [('text-align', 'left')]},
-                {'selector': 'th.col_heading.level0', 'props': [('max-width', '150px')]}, # Adjust width as needed
-                {'selector': 'td', 'props': [('word-wrap', 'break-word')]} # Wrap text to new lines
-            ])
-
-            st.dataframe(df_display, use_container_width=True)
-
-            # --- Competitors and Target Location/Market Section ---
-            st.markdown("---")
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.markdown('<h3 class="competitors-title">🏢 Competitors</h3>', unsafe_allow_html=True)
-
-                if competitors_mentioned:
-                    st.markdown("The following competitors were mentioned in your brief:")
-                    for competitor in competitors_mentioned:
-                        st.markdown(f"- {competitor}")
-                else:
-                    st.markdown('<p class="error-text">No competitors were mentioned in your brief.</p>', unsafe_allow_html=True)
-                    st.markdown("Identifying competitors helps you understand the market landscape and differentiate your offering.")
-
-            with col2:
-                st.markdown('<h3 class="competitors-title">🌍 Target Location/Market</h3>', unsafe_allow_html=True)
-
-                target_locations = df_results.loc['Target Audience Definition', 'Target Locations'] if 'Target Audience Definition' in df_results.index else []
-
-                if target_locations:
-                    st.markdown("The following target locations/markets were mentioned in your brief:")
-                    for location in target_locations:
-                        st.markdown(f"- {location}")
-                else:
-                    st.markdown('<p class="error-text">No target locations/markets were mentioned in your brief.</p>', unsafe_allow_html=True)
-                    st.markdown("Specifying target locations/markets helps tailor your strategy to specific regions and audiences.")
-
-            # --- Sentiment and Gap Analysis Section ---
-            st.markdown("---")
-            col1, col2 = st.columns([1, 1], gap="large")  # Add gap between columns
-
-            with col1:
-                st.markdown('<h3 class="sentiment-title">😊 Sentiment Analysis</h3>', unsafe_allow_html=True)
-                st.write(polarity_text)
-                st.write(subjectivity_text)
-
-            with col2:
-                st.markdown('<h3 class="gap-analysis-title">🔍 Gap Analysis</h3>', unsafe_allow_html=True)
-
-                if gap_analysis_results:
-                    st.markdown("The following elements appear to be missing from your brief:")
-                    for item in gap_analysis_results:
-                        st.markdown(f'<li class="gap-analysis-item">{item}</li>', unsafe_allow_html=True)
-                else:
-                    st.success("✅ No missing elements detected! Your brief looks comprehensive.")
+        pages_text = f" from {extraction_stats['pages']} pages" if extraction_stats['pages'] else ""
+        st.caption(f"Extracted {extraction_stats['characters']:,} characters{pages_text} in {extraction_stats['seconds']:.2f}s")
+        if extraction_stats['truncated']:
+            st.warning(f"Only the first {extraction_stats['pages']} pages could be read; the analysis covers those pages.")
 
-            # Areas for Improvement (using accordions)
-            st.markdown("---")
-            st.header("Actionable Insights")
-            improvement_areas = parse_and_improve(df_results, overall_score)
-
-            for category, details in improvement_areas.items():
-                score = df_results.loc[category, 'Score'] # Get the score for the category
-                with st.expander(f"**{category} ({score}/100)**"):  # Include score in title
-                    st.markdown("""
-                    <style>
-                        .suggestion-text {
-                            font-size: 16px; 
-                        }
-                    </style>
-                    """, unsafe_allow_html=True)
-
-                    # Display short description (taken from the 'Feedback' column)
-                    st.markdown(f"<p class='suggestion-text'>{df_results.loc[category, 'Feedback']}</p>", unsafe_allow_html=True)
-
-                    # Display suggestions
-                    st.markdown("<p class='suggestion-text'><strong>Suggestions:</strong></p>", unsafe_allow_html=True)
-                    for suggestion in details["Suggestions"]:
-                        st.write(f"- {suggestion}")
-
-                    # Access and display extracted data 
-                    for col in df_results.columns:
-                        if col not in ['Score', 'Feedback', 'Suggestions', 'Examples'] and df_results.loc[category, col]: 
-                            values = df_results.loc[category, col]
-                            st.write(f"**{col.replace('_', ' ').title()}: {', '.join(values) if isinstance(values, list) else values}")
-
-            # --- Improved Brief Section ---
-            st.markdown("---")
-            st.header("✨ Improved Brief (Premium Feature)")
-            st.markdown("This section provides an improved version of your brief based on our analysis. Upgrade to access full features!")
-
-            if st.button("Generate Improved Brief"):
-                with st.spinner("Generating improved brief..."):
-                    improved_brief, suggestions, from_to_quotes = rewrite_brief(st.session_state['document_text'], st.session_state['df_results'])
-
-                st.success("Your improved brief is ready!")
-                
-                # Display original and improved briefs side by side
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.markdown('<h3 class="sentiment-title">Original Brief</h3>', unsafe_allow_html=True)
-                    st.text_area("Original Brief", value=st.session_state['document_text'], height=300)
-                
-                with col2:
-                    st.markdown('<h3 class="sentiment-title">Improved Brief</h3>', unsafe_allow_html=True)
-                    st.text_area("Improved Brief", value=improved_brief, height=300, key="improved_brief")
-
-                # --- Download Button (Word DOCX) ---
-                doc = docx.Document()
-                doc.add_paragraph(improved_brief)
-                doc_bytes = io.BytesIO()
-                doc.save(doc_bytes)
-                doc_bytes.seek(0)
-
-                st.download_button(
-                    label="Download Improved Brief (DOCX)",
-                    data=doc_bytes,
-                    file_name="improved_brief.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        # --- Analyze the Text ---
+        # Preview the score and categories while Gemini is still generating,
+        # then replace the preview with the full results below
+        analysis, result_key = None, None
+        preview = st.empty()
+        with preview.container():
+            queue_placeholder = st.empty()
+            score_placeholder = st.empty()
+            with st.spinner("Analyzing your brief..."):
+                analysis_events = analyze_text_stream(
+                    document_text, user_id=st.session_state['user_id'], stored_key=st.session_state.get('analysis_key')
                 )
+                for event in event_loop.iterate(analysis_events):
+                    if event[0] == 'queued':
+                        show_queue_position(queue_placeholder, event[1])
+                        continue
+                    queue_placeholder.empty()
+                    if event[0] == 'overall_score':
+                        score_placeholder.metric("Overall Score", f"{event[1]}/100")
+                    elif event[0] == 'category':
+                        _, category, details = event
+                        with st.expander(f"**{category.replace('_', ' ').title()} ({details.get('score', '?')}/100)**"):
+                            st.write(details.get('feedback', ''))
+                    else:
+                        _, analysis, result_key = event
+        preview.empty()
+        # Passed back on the next rerun, so a fallback model's answer is served again instead of re-asked
+        st.session_state['analysis_key'] = result_key
+
+        # The text and analysis are held once in the shared caches, and released by the
+        # session registry when this session idles out
+        refs = [(extraction_cache, extraction_stats['key'], approximate_size(document_text))]
+        if analysis is not None:
+            refs.append((analysis_cache, result_key, approximate_size(analysis)))
+        session_registry.touch(st.session_state['user_id'], refs)
 
-                # --- Major Improvements Section ---
-                st.markdown("---")
-                st.header("📈 Major Improvements")
-                st.markdown("""
-                    In this section, we highlight major improvements made to your marketing brief. These improvements are based on a detailed analysis and aim to enhance the effectiveness of your brief.
-                    Below are some examples of changes made:
-                    - **Target Audience Definition:** From "No target demographics specified" to "Included target demographics such as age 25-34, gender: female, location: New York, interests: fitness, wellness."
-                    - **Competitive Analysis:** From "No competitors mentioned" to "Added relevant competitors such as Competitor A, Competitor B, Competitor C."
-                    - **Key Performance Indicators (KPIs):** From "No KPIs defined" to "Included KPIs such as conversion rate, click-through rate, customer acquisition cost."
-                """)
-                if from_to_quotes:
-                    for category, quotes in from_to_quotes.items():
-                        with st.expander(f"**{category}**"):
-                            st.markdown(f"**From:** {quotes['from']}")
-                            st.markdown(f"**To:** {quotes['to']}")
-                else:
-                    st.markdown("No additional suggestions were generated.")
-
+        # --- Display Results ---
+        # Each section is a fragment, so interacting with one reruns only that section; they get
+        # cache keys (the analysis key names the model that answered) and look the data up
+        if analysis is not None:
+            render_results(extraction_stats['key'], result_key)
+            render_improved_brief(extraction_stats['key'], result_key)
         else:
             st.error("Error analyzing the text. Please try again.")
 
     except Exception as e:
         st.error(f"An error occurred: {e}")
 
-# --- Benefits Section ---
-st.markdown("---")
-st.header("Why Choose Briefly?")
-st.markdown(
-    """
-    <p class="section-description">
-        Briefly combines the expertise of seasoned marketing professionals with the power of AI to help you craft marketing briefs that drive success. Our platform provides you with the tools and insights needed to ensure your campaigns are effective, targeted, and impactful.
-    </p>
-    """,
-    unsafe_allow_html=True,
-)
-
-# Use the new CSS classes in your HTML structure
-st.markdown('<div class="benefit-card-container">', unsafe_allow_html=True)
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.markdown(
-        """
-        <div class="benefit-card">
-            <div class="benefit-container">
-                <span class="benefit-icon">🧠</span> 
-                <h3 class="benefit-title">Get Expert Advice</h3>
-            </div>
-            <p class="benefit-description">Benefit from the collective wisdom of seasoned marketing professionals. Briefly's AI analyzes your brief and provides tailored recommendations based on industry best practices, ensuring your strategy is set up for success.</p>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-with col2:
-    st.markdown(
-        """
-        <div class="benefit-card">
-            <div class="benefit-container">
-                <span class="benefit-icon">💪</span> 
-                <h3 class="benefit-title">Craft Briefs with Confidence</h3>
-            </div>
-            <p class="benefit-description">Eliminate the guesswork and uncertainty from brief creation. Briefly's intuitive platform guides you through each step, providing clear suggestions and actionable insights so you can build winning briefs every time.</p>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-with col3:
-    st.markdown(
-        """
-        <div class="benefit-card">
-            <div class="benefit-container">
-                <span class="benefit-icon">🚀</span> 
-                <h3 class="benefit-title">Create Business Impact</h3>
-            </div>
-            <p class="benefit-description">Don't just launch campaigns—drive measurable results. Briefly helps you define clear objectives, track key metrics, and optimize your strategies to maximize your marketing ROI and achieve your business goals.</p>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-st.markdown('</div>', unsafe_allow_html=True) # Close the benefit-card-container
-
-# --- Understanding Your Scores Section ---
-st.markdown("---")
-st.header("What We Focus On To Score Your Briefs")
-st.markdown(
-    "Our expert analysis powered by AI evaluates your marketing brief across key areas to pinpoint strengths and highlight opportunities for improvement.  Click on each category below to learn more:"
-)
-
-# Category Explanations (Tabs)
-categories = {
-    "🎯 Clarity of Objectives": {
-        "What We Look For": "Clearly defined, measurable, and achievable marketing objectives that align with your overall business goals.",
-        "Why It Matters": "Clear objectives ensure everyone understands the goals and can work towards them effectively.",
-        "Tips to Improve": " - Use the SMART framework (Specific, Measurable, Achievable, Relevant, Time-bound).<br> - Clearly link objectives to business outcomes.<br> - Ensure alignment across your marketing team."
-    },
-    "🤝 Strategic Alignment": {
-        "What We Look For": "Clear links between your marketing campaign and your overall business objectives and strategies.",
-        "Why It Matters": "Ensures your marketing efforts directly contribute to achieving your company's wider goals.",
-        "Tips to Improve": " - Explicitly state how the campaign supports key business goals.<br> - Align marketing metrics with business KPIs.<br> - Communicate the campaign's strategic importance to stakeholders."
-    },
-    "👥 Target Audience Definition": {
-        "What We Look For": "A well-defined target audience with specific demographics, psychographics, behaviors, and needs.",
-        "Why It Matters": "Understanding your audience is crucial for crafting targeted messaging and choosing the right channels.",
-        "Tips to Improve": " - Create detailed buyer personas.<br> - Conduct market research to understand your audience's needs and pain points.<br> - Use data to segment your audience for more targeted campaigns."
-    },
-    "⚔️ Competitive Analysis": {
-        "What We Look For": "Thorough research on your competitors, highlighting their strengths, weaknesses, and your brand's unique value proposition.",
-        "Why It Matters": "A strong competitive analysis helps you differentiate your offering and develop more effective strategies.",
-        "Tips to Improve": " - Identify your top competitors.<br> - Analyze their marketing strategies, target audience, and messaging.<br> - Clearly articulate your competitive advantages."
-    },
-    "🗺️ Channel Strategy": {
-        "What We Look For": "A strategic approach to channel selection, ensuring you reach your target audience in the most effective way.",
-        "Why It Matters": "The right channels amplify your message and maximize your campaign's reach.",
-        "Tips to Improve": " - Consider your target audience's preferred channels.<br> - Research the strengths and limitations of different channels.<br> - Use a mix of online and offline channels for a holistic approach."
-    },
-    "🔑 Key Performance Indicators (KPIs)": {
-        "What We Look For": "Specific, measurable, and relevant KPIs that align with your objectives and allow you to track campaign performance.",
-        "Why It Matters": "KPIs provide insights into what's working and what's not, enabling data-driven optimization.",
-        "Tips to Improve": " - Choose KPIs that directly relate to your objectives.<br> - Set realistic and measurable targets for each KPI.<br> - Regularly track and analyze your KPIs to make data-driven adjustments."
-    },
-}
-
-# CSS Styling 
-st.markdown(
-    """
-    <style>
-        /* Style for tab titles */
-        button[data-baseweb="tab"] { 
-            font-size: 18px !important; /* Adjust font size as needed */
-        }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
-
-# Create tabs
-tabs = st.tabs(list(categories.keys()))
-
-# Display content for each tab
-for i, (category, details) in enumerate(categories.items()):
-    with tabs[i]:
-        st.markdown(f"**What We Look For:** {details['What We Look For']}")
-        st.markdown(f"**Why It Matters:** {details['Why It Matters']}")
-        st.markdown(f"**Tips to Improve:** {details['Tips to Improve']}", unsafe_allow_html=True)
-
-
-# --- FAQ Section ---
-st.markdown("---")
-st.header("Frequently Asked Questions (FAQ)")
-
-faq_items = [
-    {
-        "question": "How does Briefly analyze my marketing brief?",
-        "answer": """
-        Briefly uses advanced natural language processing (NLP) techniques and machine learning models to analyze your marketing brief. 
-        It evaluates various aspects such as clarity of objectives, strategic alignment, target audience definition, competitive analysis, channel strategy, and key performance indicators (KPIs).
-        """
-    },
-    {
-        "question": "What metrics are used in the analysis?",
-        "answer": """
-        The analysis includes several metrics:
-        
-        | Criterion                  | Description                                                                                      | Importance                                                                                           | Tips for Improvement                                                                                                                                           |
-        |----------------------------|--------------------------------------------------------------------------------------------------|------------------------------------------------------------------------------------------------------|-----------------------------------------------------------------------------------------------------------------------------------------------------------------|
-        | Clarity of Objectives      | Evaluates how clear and specific the objectives of the marketing brief are.                      | Clear objectives help ensure everyone understands the goals and can work towards them effectively.   | Define specific, measurable, achievable, relevant, and time-bound (SMART) objectives.                                     |
-        | Strategic Alignment        | Checks if the brief aligns with overall business goals and strategies.                           | Ensures the marketing efforts support the broader business objectives.                               | Clearly articulate how the campaign supports the company's overall marketing and business objectives.                      |
-        | Target Audience Definition | Assesses how well-defined and relevant the target audience is.                                   | A well-defined target audience helps tailor the marketing strategy to reach the right people.        | Specify demographics, psychographics, behaviors, and needs of the target audience.                                         |
-        | Competitive Analysis       | Identifies competitors and competitive advantages mentioned in the brief.                        | Understanding competitors helps differentiate your offering and develop effective strategies.        | Research and identify key competitors, analyze their strengths and weaknesses, and highlight your unique value proposition. |
-        | Channel Strategy           | Recommends effective channels for the campaign based on the brief.                               | Choosing the right channels ensures the message reaches the target audience effectively.             | Develop a comprehensive channel strategy and justify the selection of each channel based on its relevance to the audience.  |
-        | Key Performance Indicators (KPIs) | Suggests key performance indicators to track the success of the campaign.                          | KPIs help measure the effectiveness of the campaign and guide data-driven adjustments.               | Define specific and measurable KPIs related to your objectives, such as website traffic, lead generation, and sales conversions. |
-        """
-    },
-    {
-        "question": "Can I see examples of improvements?",
-        "answer": """
-        Yes, here are some examples:
-        - **Target Audience Definition:** From "No target demographics specified" to "Included target demographics such as age 25-34, gender: female, location: New York, interests: fitness, wellness."
-        - **Competitive Analysis:** From "No competitors mentioned" to "Added relevant competitors such as Competitor A, Competitor B, Competitor C."
-        - **Key Performance Indicators (KPIs):** From "No KPIs defined" to "Included KPIs such as conversion rate, click-through rate, customer acquisition cost."
-        """
-    },
-    {
-        "question": "How are the scores calculated?",
-        "answer": """
-        Scores are calculated based on a combination of factors including clarity, relevance, completeness, and alignment with best practices. 
-        Each aspect of the brief is evaluated and given a score out of 100, which contributes to the overall score.
-        """
-    },
-    {
-        "question": "What should I do if my brief has a low score?",
-        "answer": """
-        If your brief has a low score, review the detailed feedback and suggestions provided. Focus on improving areas with the lowest scores first. 
-        Use the actionable insights to refine your objectives, better define your target audience, align your strategy with business goals, and specify clear KPIs.
-        """
-    }
-]
-
-for item in faq_items:
-    with st.expander(item["question"]):
-        st.markdown(item["answer"])
+render_static_sections()
 
 add_footer()
\ No newline at end of file
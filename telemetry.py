@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Serve Prometheus metrics on this port when set (one port per app process)
+METRICS_PORT = int(os.environ.get("BRIEFLY_METRICS_PORT", 0))
+# INFO logs one JSON line per timed stage; DEBUG adds sampled prompt/response details
+LOG_LEVEL = os.environ.get("BRIEFLY_LOG_LEVEL", "WARNING").upper()
+# Share of debug_sample calls that are actually logged
+DEBUG_SAMPLE_RATE = float(os.environ.get("BRIEFLY_DEBUG_SAMPLE_RATE", 0.01))
+# Longest text field written by debug_sample
+DEBUG_TEXT_LIMIT = 500
+
+# Histogram of every timed pipeline stage, labelled by stage
+STAGE_METRIC = "briefly_stage_seconds"
+
+# Histogram bucket upper bounds in seconds, from cache hits up to slow Gemini calls
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, message and any ``fields`` passed via extra."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+logger = logging.getLogger("briefly")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(JsonFormatter())
+    logger.addHandler(_handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+_histograms = {}  # (name, labels) -> Histogram
+_counters = {}  # (name, labels) -> float
+_caches = {}  # name -> object with hits/misses counts
+_lock = threading.Lock()
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def observe(name, seconds, **labels):
+    key = (name, _label_key(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+def increment(name, value=1, **labels):
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def watch_cache(name, cache):
+    """Exports a cache's own hit/miss counts (e.g. an LRUCache) as briefly_cache_requests_total."""
+    with _lock:
+        _caches[name] = cache
+
+def record_cache(name, hit):
+    """Counts a hit or miss for caches that do not count their own."""
+    increment("briefly_cache_requests_total", cache=name, result="hit" if hit else "miss")
+
+@contextmanager
+def span(stage, **labels):
+    """Times a pipeline stage into briefly_stage_seconds and logs it as a JSON line at INFO.
+
+    Yields the labels dict, so labels only known mid-stage (e.g. which parse
+    path was taken) can still be added.
+    """
+    start = time.perf_counter()
+    try:
+        yield labels
+    finally:
+        seconds = time.perf_counter() - start
+        observe(STAGE_METRIC, seconds, stage=stage, **labels)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("span", extra={"fields": {"stage": stage, "seconds": round(seconds, 4), **labels}})
+
+def log_event(event, level=logging.WARNING, **fields):
+    """Logs one JSON line for ``event`` at ``level`` (WARNING by default), with ``fields`` as keys."""
+    logger.log(level, event, extra={"fields": fields})
+
+def debug_sample(event, **fields):
+    """Logs a sampled DEBUG line, truncating long text so prompts and briefs are never dumped whole."""
+    if not logger.isEnabledFor(logging.DEBUG) or random.random() >= DEBUG_SAMPLE_RATE:
+        return
+    logger.debug(event, extra={"fields": {key: _truncate(value) for key, value in fields.items()}})
+
+def _truncate(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = value if isinstance(value, str) else str(value)
+    if len(text) <= DEBUG_TEXT_LIMIT:
+        return text
+    return text[:DEBUG_TEXT_LIMIT] + f"... ({len(text)} chars)"
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{key}="{value}"'.replace("\n", " ") for key, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        histograms = {key: (list(h.counts), h.total, h.count) for key, h in _histograms.items()}
+        counters = dict(_counters)
+        caches = dict(_caches)
+    for name, cache in caches.items():
+        counters[("briefly_cache_requests_total", (("cache", name), ("result", "hit")))] = cache.hits
+        counters[("briefly_cache_requests_total", (("cache", name), ("result", "miss")))] = cache.misses
+
+    lines = []
+    for metric in sorted({name for name, _ in histograms}):
+        lines.append(f"# TYPE {metric} histogram")
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            if name != metric:
+                continue
+            for bound, bucket_count in zip(BUCKETS, counts):
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', le)])} {bucket_count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    for metric in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {metric} counter")
+        for (name, labels), value in sorted(counters.items()):
+            if name == metric:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes are not worth a log line each
+
+_server = None
+_server_started = False
+
+def start_metrics_server(port=METRICS_PORT):
+    """Serves /metrics from a daemon thread; only the first call per process does anything."""
+    global _server, _server_started
+    with _lock:
+        if _server_started or not port:
+            return _server
+        _server_started = True
+        try:
+            _server = ThreadingHTTPServer(("", port), _MetricsHandler)
+        except OSError as e:
+            log_event("metrics_server_failed", port=port, error=str(e))
+            return None
+    threading.Thread(target=_server.serve_forever, name="briefly-metrics", daemon=True).start()
+    return _server
@@ -1,11 +1,199 @@
-import docx
-import PyPDF2
+import contextlib
+import hashlib
 import io
+import logging
+import mmap
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
 import streamlit as st
+from long_document import CHARS_PER_TOKEN
+from analysis_cache import LRUCache
+from result_store import ResultStore
+from telemetry import log_event, record_cache, span, watch_cache
+
+# Header/footer lines are looked for among this many lines at each end of a page
+BOILERPLATE_LINES_PER_EDGE = 3
+# A line counts as boilerplate when it recurs on at least this share of pages
+BOILERPLATE_PAGE_SHARE = 0.5
+
+# Limits so one huge or slow PDF cannot pin a worker for minutes
+PDF_MAX_PAGES = int(os.environ.get("BRIEFLY_PDF_MAX_PAGES", 300))
+PDF_TIME_BUDGET = float(os.environ.get("BRIEFLY_PDF_TIME_BUDGET", 60))
+# PDFs with at least this many pages are extracted on a process pool
+PDF_PARALLEL_PAGES = int(os.environ.get("BRIEFLY_PDF_PARALLEL_PAGES", 40))
+PDF_WORKERS = int(os.environ.get("BRIEFLY_PDF_WORKERS", os.cpu_count() or 1))
+# Workers stop at the time budget themselves; this is how long past it we wait for their partial pages
+PDF_WORKER_GRACE = 5.0
+
+# Bump whenever extraction output changes so memoized text is not reused
+EXTRACTOR_VERSION = "4"
+extraction_cache = LRUCache(max_entries=int(os.environ.get("BRIEFLY_EXTRACTION_CACHE_ENTRIES", 64)))
+# Optional on-disk tier, enabled by pointing BRIEFLY_EXTRACTION_STORE at a SQLite file
+extraction_store = (
+    ResultStore(os.environ["BRIEFLY_EXTRACTION_STORE"]) if os.environ.get("BRIEFLY_EXTRACTION_STORE") else None
+)
+watch_cache("extraction", extraction_cache)
+
+_PAGE_NUMBER_RE = re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+_PAGE_REFERENCE_RE = re.compile(r"(page|pg\.?|p\.)\s*\d+(\s*(of|/)\s*\d+)?|\b\d+\s*(of|/)\s*\d+\b", re.IGNORECASE)
+_INLINE_SPACE_RE = re.compile(r"[ \t\f\v ]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+def _edge_indexes(lines):
+    """Indexes of the non-empty lines at the top and bottom of a page."""
+    non_empty = [i for i, line in enumerate(lines) if line]
+    return set(non_empty[:BOILERPLATE_LINES_PER_EDGE] + non_empty[-BOILERPLATE_LINES_PER_EDGE:])
+
+def _signature(line):
+    # Mask page references so "Draft | Page 3 of 12" matches "Draft | Page 4 of 12".
+    # Only short lines are masked, so numbered body text is never mistaken for a footer.
+    if len(line) > 40:
+        return line.lower()
+    return _PAGE_REFERENCE_RE.sub("#", line.lower())
+
+def collapse_whitespace(text):
+    text = _INLINE_SPACE_RE.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+def normalize_pages(pages):
+    """Removes repeated headers/footers and page numbers, then collapses whitespace.
+
+    Returns the joined text and a dict of how much was removed.
+    """
+    page_lines = [[line.strip() for line in collapse_whitespace(page).split("\n")] for page in pages]
+
+    # Count on how many pages each header/footer candidate appears
+    counts = {}
+    for lines in page_lines:
+        for signature in {_signature(lines[i]) for i in _edge_indexes(lines)}:
+            counts[signature] = counts.get(signature, 0) + 1
+    min_pages = max(2, int(len(pages) * BOILERPLATE_PAGE_SHARE + 0.5))
+
+    def is_boilerplate(line):
+        return bool(_PAGE_NUMBER_RE.match(line)) or counts.get(_signature(line), 0) >= min_pages
+
+    kept_pages = []
+    for lines in page_lines:
+        non_empty = [i for i, line in enumerate(lines) if line]
+        # Strip from each edge inward, stopping at the first line that is not
+        # boilerplate, so repeated body lines (e.g. table header rows) survive
+        removed = set()
+        for edge in (non_empty[:BOILERPLATE_LINES_PER_EDGE], non_empty[::-1][:BOILERPLATE_LINES_PER_EDGE]):
+            for i in edge:
+                if not is_boilerplate(lines[i]):
+                    break
+                removed.add(i)
+        kept_pages.append("\n".join(line for i, line in enumerate(lines) if i not in removed))
+
+    text = collapse_whitespace("\n\n".join(kept_pages))
+    original_chars = sum(len(page) for page in pages)
+    chars_saved = max(0, original_chars - len(text))
+    stats = {
+        "chars_saved": chars_saved,
+        "tokens_saved": chars_saved // CHARS_PER_TOKEN,
+    }
+    return text, stats
+
+def _open_source(source):
+    """Opens bytes, a path or a binary file object as a seekable handle without copying it."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return contextlib.nullcontext(io.BytesIO(source))
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb")
+    source.seek(0)
+    return contextlib.nullcontext(source)
+
+@contextlib.contextmanager
+def _source_path(source):
+    """Yields a filesystem path for the source, spooling in-memory data to a temp file if needed."""
+    if isinstance(source, (str, os.PathLike)):
+        yield source
+        return
+
+    with _open_source(source) as file, tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as spool:
+        shutil.copyfileobj(file, spool, 1024 * 1024)
+    try:
+        yield spool.name
+    finally:
+        os.unlink(spool.name)
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def _paragraph_text(paragraph):
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == _W + "t":
+            parts.append(node.text or "")
+        elif node.tag == _W + "tab":
+            parts.append("\t")
+        elif node.tag in (_W + "br", _W + "cr"):
+            parts.append("\n")
+    return "".join(parts)
+
+def iter_docx_blocks(file):
+    """Streams paragraphs and table rows from a DOCX's word/document.xml in document order.
+
+    Table rows are yielded as their cell texts joined with " | ". Elements
+    are cleared as soon as they are read, so memory stays bounded by the
+    largest paragraph or row rather than the document.
+    """
+    with zipfile.ZipFile(file) as archive, archive.open("word/document.xml") as document:
+        body = None
+        rows = []  # One list of cells per open table row (tables can nest)
+        cells = []  # One list of paragraph texts per open table cell
+        for event, elem in ElementTree.iterparse(document, events=("start", "end")):
+            if event == "start":
+                if elem.tag == _W + "body":
+                    body = elem
+                elif elem.tag == _W + "tr":
+                    rows.append([])
+                elif elem.tag == _W + "tc":
+                    cells.append([])
+                continue
+
+            if elem.tag == _W + "p":
+                text = _paragraph_text(elem)
+                elem.clear()
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield text
+            elif elem.tag == _W + "tc":
+                rows[-1].append("\n".join(cells.pop()).strip())
+            elif elem.tag == _W + "tr":
+                row = [cell for cell in rows.pop() if cell]
+                if cells:
+                    cells[-1].append(" | ".join(row))
+                elif row:
+                    yield " | ".join(row)
+            elif elem.tag == _W + "tbl" and not rows:
+                elem.clear()
+
+            # Drop finished top-level blocks so the tree never grows with the document
+            if body is not None and not rows and elem.tag in (_W + "p", _W + "tbl"):
+                body.clear()
+
+def extract_text_from_docx(source):
+    """Extracts DOCX text from bytes, a path or a binary file object."""
+    try:
+        with _open_source(source) as file:
+            return '\n'.join(iter_docx_blocks(file))
+    except (KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+        log_event("docx_fast_path_failed", action="falling back to python-docx", error=str(e))
 
-def extract_text_from_docx(file_bytes):
     try:
-        doc = docx.Document(io.BytesIO(file_bytes))
+        import docx
+        with _open_source(source) as file:
+            doc = docx.Document(file)
         text = []
         for paragraph in doc.paragraphs:
             text.append(paragraph.text)
@@ -14,14 +202,163 @@ def extract_text_from_docx(file_bytes):
         st.error(f"Error extracting text from DOCX: {e}")
         return None
 
-def extract_text_from_pdf(file_bytes):
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+def _get_pdf_pool():
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Forking a server that runs threads and an event loop can copy held locks into the
+            # workers; spawned workers start clean and only import this module
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pdf_pool
+
+def _extract_page_range(path, start, stop, deadline):
+    """Extracts pages [start, stop) in a worker, stopping early once the deadline passes.
+
+    The first page is always extracted, so a worker that started late (e.g.
+    while the pool was still spawning) still returns something to show.
+    """
+    import PyPDF2
+
+    # Workers map the spooled file instead of receiving a pickled copy of the document
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        pdf_reader = PyPDF2.PdfReader(data)
+        pages = []
+        for page_num in range(start, stop):
+            if pages and time.time() > deadline:
+                break
+            pages.append(pdf_reader.pages[page_num].extract_text() or "")
+        return pages
+
+def iter_pdf_pages(source, max_pages=PDF_MAX_PAGES, time_budget=PDF_TIME_BUDGET, info=None):
+    """Yields the text of each PDF page in order.
+
+    Stops after ``max_pages`` pages or once ``time_budget`` seconds have
+    passed. Large documents are spooled to disk and split into page ranges
+    extracted on a process pool, unless we are already inside a worker.
+    If ``info`` is a dict, its "total_pages" is set to the document's page count.
+    """
+    import PyPDF2
+
+    deadline = time.time() + time_budget
+    with _open_source(source) as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        if info is not None:
+            info["total_pages"] = len(pdf_reader.pages)
+        page_count = min(len(pdf_reader.pages), max_pages)
+
+        if page_count < PDF_PARALLEL_PAGES or PDF_WORKERS < 2 or multiprocessing.parent_process() is not None:
+            for page_num in range(page_count):
+                if time.time() > deadline:
+                    return
+                yield pdf_reader.pages[page_num].extract_text() or ""
+            return
+
+    range_size = -(-page_count // PDF_WORKERS)
+    ranges = [(start, min(start + range_size, page_count)) for start in range(0, page_count, range_size)]
+    pool = _get_pdf_pool()
+    with _source_path(source) as path:
+        futures = [pool.submit(_extract_page_range, path, start, stop, deadline) for start, stop in ranges]
+        try:
+            for future, (start, stop) in zip(futures, ranges):
+                pages = future.result(timeout=max(0.0, deadline - time.time()) + PDF_WORKER_GRACE)
+                yield from pages
+                if len(pages) < stop - start:
+                    return  # The worker ran out of time; keep the output contiguous
+        except TimeoutError:
+            return
+        finally:
+            for future in futures:
+                future.cancel()
+
+def extract_pdf_with_stats(source, max_pages=PDF_MAX_PAGES, time_budget=PDF_TIME_BUDGET):
+    """Returns the normalized PDF text and a dict with page count and boilerplate savings.
+
+    ``stats["truncated"]`` is True when the page cap or time budget stopped
+    extraction before the last page, and ``stats["timed_out"]`` when it was
+    the time budget. Raises ValueError if no page was extracted.
+    """
+    info = {}
+    pages = list(iter_pdf_pages(source, max_pages, time_budget, info))
+    if not pages:
+        raise ValueError("no pages could be extracted within the page and time limits")
+    text, stats = normalize_pages(pages)
+    if stats["chars_saved"]:
+        log_event("boilerplate_removed", logging.INFO, chars=stats['chars_saved'], tokens=stats['tokens_saved'])
+    stats["pages"] = len(pages)
+    stats["truncated"] = len(pages) < info["total_pages"]
+    # Pages come out contiguous, so falling short of the page cap means the budget ran out
+    stats["timed_out"] = len(pages) < min(info["total_pages"], max_pages)
+    return text, stats
+
+def extract_text_from_pdf(source, max_pages=PDF_MAX_PAGES, time_budget=PDF_TIME_BUDGET):
+    """Extracts PDF text from bytes, a path or a binary file object."""
     try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-        text = ""
-        for page_num in range(len(pdf_reader.pages)):  # Use len(pdf_reader.pages)
-            page = pdf_reader.pages[page_num]         # Access pages using []
-            text += page.extract_text()
-        return text
+        return extract_pdf_with_stats(source, max_pages, time_budget)[0]
     except Exception as e:
         st.error(f"Error extracting text from PDF: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def file_digest(source):
+    """SHA-256 of the source's contents, read in chunks rather than copied."""
+    with span("upload_read"):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return hashlib.sha256(source).hexdigest()
+        with _open_source(source) as file:
+            return hashlib.file_digest(file, "sha256").hexdigest()
+
+def extract_document(file_name, source):
+    """Extracts a DOCX or PDF, memoized by content digest, extractor version and PDF limits.
+
+    Returns ``(text, stats)`` where stats holds the page count (PDF only),
+    characters extracted, seconds spent, whether a PDF was ``truncated`` by
+    the page cap or time budget, and the extraction_cache ``key``;
+    ``(None, None)`` on failure or for unsupported file types. Cache hits
+    return the stats of the original extraction. PDFs cut short by the page
+    cap are memoized like any other, since the cap is part of the key; ones
+    cut short by the time budget can differ from run to run, so they are kept
+    in memory only, under their own key that later uploads never look up.
+    """
+    extension = os.path.splitext(file_name.lower())[1]
+    if extension not in (".docx", ".pdf"):
+        return None, None
+
+    limits = f":{PDF_MAX_PAGES}p:{PDF_TIME_BUDGET:g}s" if extension == ".pdf" else ""
+    key = f"{EXTRACTOR_VERSION}{extension}{limits}:{file_digest(source)}"
+    cached = extraction_cache.get(key)
+    if cached is None and extraction_store is not None:
+        cached = extraction_store.get(key)
+        record_cache("extraction_store", cached is not None)
+        if cached is not None:
+            extraction_cache.put(key, cached)
+    if cached is not None:
+        return cached["text"], {**cached["stats"], "key": key}
+
+    start = time.perf_counter()
+    with span("extraction", kind=extension[1:]):
+        if extension == ".docx":
+            text = extract_text_from_docx(source)
+            stats = {"pages": None, "truncated": False, "timed_out": False}
+        else:
+            try:
+                text, stats = extract_pdf_with_stats(source, PDF_MAX_PAGES, PDF_TIME_BUDGET)
+            except Exception as e:
+                st.error(f"Error extracting text from PDF: {e}")
+                text = None
+    if text is None:
+        return None, None
+
+    stats["characters"] = len(text)
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    entry = {"text": text, "stats": stats}
+    if stats["timed_out"]:
+        # Still reachable by key for the session that uploaded it, and released with that session
+        key = f"{key}:timed_out"
+        extraction_cache.put(key, entry)
+    else:
+        extraction_cache.put(key, entry)
+        if extraction_store is not None:
+            extraction_store.put(key, entry)
+    return text, {**stats, "key": key}
@@ -1,3 +1,7 @@
+from operator import attrgetter
+
+from telemetry import span
+
 def clean_response(response_text):
     """Cleans up the response text before JSON parsing."""
     # 1. Remove leading/trailing whitespace:
@@ -12,106 +16,99 @@ def clean_response(response_text):
 
     return response_text
 
-def parse_and_improve(df, overall_score):
+# Declarative suggestion rules, evaluated in order for each category title:
+#   ("listed", field, template):     when the field has values, template with {values} joined by ", "
+#   ("missing", fields, text):       when none of the fields have values
+#   ("each", field, template):       one suggestion per value, as {value}
+#   ("paired", (a, b), template):    one per matching pair of values, as {first} and {second}
+# Adding a category or a suggestion only means adding rows here.
+SUGGESTION_RULES = [
+    ("Clarity Of Objectives", "listed", "extracted_objectives",
+     "Consider refining the following objectives to ensure they are clear, measurable, and ambitious: {values}"),
+    ("Clarity Of Objectives", "missing", ("extracted_objectives",),
+     "Clearly define specific, measurable, achievable, relevant, and time-bound (SMART) objectives for the campaign."),
+    ("Clarity Of Objectives", "listed", "keywords",
+     "Ensure these keywords are strategically and consistently incorporated throughout the marketing materials to enhance visibility, searchability, and reach: {values}"),
+
+    ("Strategic Alignment", "listed", "alignment_issues",
+     "Carefully review and address the following potential misalignments with overall business goals to ensure the campaign effectively contributes to key strategic priorities: {values}"),
+    ("Strategic Alignment", "missing", ("alignment_issues",),
+     "Clearly articulate how the campaign directly aligns with and supports the company's overall marketing and business objectives. Provide specific examples to demonstrate the connection."),
+
+    ("Target Audience Definition", "listed", "extracted_demographics",
+     "Refine targeting by providing more specific information about the desired audience. Consider these extracted demographics: {values}"),
+    ("Target Audience Definition", "listed", "target_audience_examples",
+     "While '{values}' provides a starting point, explore and define the target audience more comprehensively. Include demographics, psychographics, behaviors, and needs."),
+    ("Target Audience Definition", "missing", ("extracted_demographics", "target_audience_examples"),
+     "Define a specific target audience by considering demographics, psychographics, behaviors, and needs. Avoid overly broad descriptions."),
+
+    ("Competitive Analysis", "listed", "competitors_mentioned",
+     "Conduct a thorough analysis of these competitors to identify opportunities for differentiation and develop effective competitive strategies: {values}"),
+    ("Competitive Analysis", "missing", ("competitors_mentioned",),
+     "Research and identify key competitors. Analyze their strengths, weaknesses, target audience, and marketing strategies. Use this information to differentiate your offering and highlight its unique value proposition."),
+    ("Competitive Analysis", "listed", "competitive_advantages",
+     "Clearly and compellingly highlight these competitive advantages in your messaging and positioning to stand out in the market: {values}"),
+    ("Competitive Analysis", "missing", ("competitive_advantages",),
+     "Identify and clearly articulate your competitive advantages. What makes your product/service stand out from the competition? Highlight these advantages in your messaging."),
+
+    ("Channel Strategy", "listed", "recommended_channels",
+     "Evaluate the suitability of these channels for your target audience and campaign objectives: {values}"),
+    ("Channel Strategy", "missing", ("recommended_channels",),
+     "Develop a comprehensive channel strategy that outlines the specific channels to be used (e.g., social media, email, paid advertising, content marketing). Justify the selection of each channel based on its relevance to the target audience and campaign goals."),
+    # Justifications are folded into the channel they explain
+    ("Channel Strategy", "paired", ("recommended_channels", "channel_justifications"),
+     " - **{first}:** {second}"),
+
+    ("Key Performance Indicators", "listed", "extracted_kpis",
+     "Establish a system for consistently tracking and measuring these KPIs to evaluate campaign performance and make data-driven adjustments: {values}"),
+    ("Key Performance Indicators", "missing", ("extracted_kpis",),
+     "Define specific and measurable KPIs to track the success of your campaign. Consider metrics related to your objectives, such as website traffic, lead generation, sales conversions, brand awareness, or customer satisfaction."),
+    ("Key Performance Indicators", "each", "kpi_suggestions",
+     "- Consider tracking {value} to gain additional insights into campaign effectiveness."),
+]
+
+def _compile_rule(kind, fields, template):
+    """Turns one rule row into a function from a CategoryResult to a list of suggestions."""
+    if kind == "listed":
+        get = attrgetter(fields)
+        return lambda category: [template.format(values=", ".join(values))] if (values := get(category)) else []
+    if kind == "missing":
+        get = attrgetter(*fields)
+        if len(fields) == 1:
+            return lambda category: [] if get(category) else [template]
+        return lambda category: [] if any(get(category)) else [template]
+    if kind == "each":
+        get = attrgetter(fields)
+        return lambda category: [template.format(value=value) for value in get(category)]
+    if kind == "paired":
+        get = attrgetter(*fields)
+        return lambda category: [template.format(first=first, second=second) for first, second in zip(*get(category))]
+    raise ValueError(f"Unknown suggestion rule kind: {kind}")
+
+def compile_rules(rules):
+    """Groups rule rows by category title into lists of compiled rule functions."""
+    compiled = {}
+    for category, kind, fields, template in rules:
+        compiled.setdefault(category, []).append(_compile_rule(kind, fields, template))
+    return compiled
+
+_COMPILED_RULES = compile_rules(SUGGESTION_RULES)
+
+def parse_and_improve(analysis, rules=_COMPILED_RULES):
+    """Builds suggestions for each category of an AnalysisResult, keyed by category title."""
+    with span("suggestions"):
+        return _improvement_areas(analysis, rules)
+
+def parse_and_improve_batch(analyses, rules=_COMPILED_RULES):
+    """parse_and_improve over a batch in one pass; failed analyses (None) map to None."""
+    with span("suggestions", batch=True):
+        return [None if analysis is None else _improvement_areas(analysis, rules) for analysis in analyses]
+
+def _improvement_areas(analysis, rules):
     improvement_areas = {}
-
-    for category, row in df.iterrows():
-        improvement_areas[category] = {
-            "Suggestions": [],
-            "Examples": []
-        }
-
-        if category == 'Clarity Of Objectives':
-            if row['Extracted Objectives']:
-                improvement_areas[category]["Suggestions"].append(
-                    f"Consider refining the following objectives to ensure they are clear, measurable, and ambitious: {', '.join(row['Extracted Objectives'])}"
-                )
-            else:
-                improvement_areas[category]["Suggestions"].append(
-                    "Clearly define specific, measurable, achievable, relevant, and time-bound (SMART) objectives for the campaign."
-                )
-
-            if row['Keywords']:
-                improvement_areas[category]["Suggestions"].append(
-                    f"Ensure these keywords are strategically and consistently incorporated throughout the marketing materials to enhance visibility, searchability, and reach: {', '.join(row['Keywords'])}"
-                )
-
-        elif category == 'Strategic Alignment':
-            if row['Alignment Issues']:
-                improvement_areas[category]["Suggestions"].append(
-                    f"Carefully review and address the following potential misalignments with overall business goals to ensure the campaign effectively contributes to key strategic priorities: {', '.join(row['Alignment Issues'])}"
-                )
-            else:
-                improvement_areas[category]["Suggestions"].append(
-                    "Clearly articulate how the campaign directly aligns with and supports the company's overall marketing and business objectives. Provide specific examples to demonstrate the connection."
-                )
-
-        elif category == 'Target Audience Definition':
-            if row['Extracted Demographics'] or row['Target Audience Examples']:
-                if row['Extracted Demographics']:
-                    demographics_str = ', '.join(row['Extracted Demographics'])
-                    improvement_areas[category]["Suggestions"].append(
-                        f"Refine targeting by providing more specific information about the desired audience. Consider these extracted demographics: {demographics_str}"
-                    )
-                if row['Target Audience Examples']:
-                    examples_str = ', '.join(row['Target Audience Examples'])
-                    improvement_areas[category]["Suggestions"].append(
-                        f"While '{examples_str}' provides a starting point, explore and define the target audience more comprehensively. Include demographics, psychographics, behaviors, and needs."
-                    )
-            else:
-                improvement_areas[category]["Suggestions"].append(
-                    "Define a specific target audience by considering demographics, psychographics, behaviors, and needs. Avoid overly broad descriptions."
-                )
-
-        elif category == 'Competitive Analysis':
-            if row['Competitors Mentioned']:
-                improvement_areas[category]["Suggestions"].append(
-                    f"Conduct a thorough analysis of these competitors to identify opportunities for differentiation and develop effective competitive strategies: {', '.join(row['Competitors Mentioned'])}"
-                )
-            else:
-                improvement_areas[category]["Suggestions"].append(
-                    "Research and identify key competitors. Analyze their strengths, weaknesses, target audience, and marketing strategies. Use this information to differentiate your offering and highlight its unique value proposition."
-                )
-
-            if row['Competitive Advantages']:
-                improvement_areas[category]["Suggestions"].append(
-                    f"Clearly and compellingly highlight these competitive advantages in your messaging and positioning to stand out in the market: {', '.join(row['Competitive Advantages'])}"
-                )
-            else:
-                improvement_areas[category]["Suggestions"].append(
-                        "Identify and clearly articulate your competitive advantages. What makes your product/service stand out from the competition? Highlight these advantages in your messaging."
-                    )
-
-        elif category == 'Channel Strategy':
-            if row['Recommended Channels']:
-                improvement_areas[category]["Suggestions"].append(
-                    f"Evaluate the suitability of these channels for your target audience and campaign objectives: {', '.join(row['Recommended Channels'])}"
-                )
-            else:
-                improvement_areas[category]["Suggestions"].append(
-                    "Develop a comprehensive channel strategy that outlines the specific channels to be used (e.g., social media, email, paid advertising, content marketing). Justify the selection of each channel based on its relevance to the target audience and campaign goals."
-                )
-
-            # Instead of just listing justifications, integrate them into the channel suggestions
-            if row['Channel Justifications']:
-                for i, justification in enumerate(row['Channel Justifications']):
-                    if i < len(row['Recommended Channels']):
-                        channel = row['Recommended Channels'][i]
-                        improvement_areas[category]["Suggestions"].append(f" - **{channel}:** {justification}")
-
-        elif category == 'Key Performance Indicators':
-            if row['Extracted KPIs']:
-                improvement_areas[category]["Suggestions"].append(
-                    f"Establish a system for consistently tracking and measuring these KPIs to evaluate campaign performance and make data-driven adjustments: {', '.join(row['Extracted KPIs'])}"
-                )
-            else:
-                improvement_areas[category]["Suggestions"].append(
-                    "Define specific and measurable KPIs to track the success of your campaign. Consider metrics related to your objectives, such as website traffic, lead generation, sales conversions, brand awareness, or customer satisfaction."
-                )
-
-            if row['KPI Suggestions']:
-                improvement_areas[category]["Suggestions"].extend(
-                    [f"- Consider tracking {suggestion} to gain additional insights into campaign effectiveness." for suggestion in row['KPI Suggestions']]
-                )
-
-    return improvement_areas
\ No newline at end of file
+    for title, category in analysis.categories.items():
+        suggestions = []
+        for rule in rules.get(title, ()):
+            suggestions.extend(rule(category))
+        improvement_areas[title] = {"Suggestions": suggestions, "Examples": []}
+    return improvement_areas